@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional, Union
+
+
+@dataclass
+class _PendingItem:
+    sequence: str
+    future: Future = field(default_factory=Future)
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        run_batch: Callable[[List[str]], Union[List[Any], Future]],
+        max_batch_size: int,
+        max_wait_ms: float,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max(max_wait_ms, 0.0) / 1000.0
+
+        self._queue: "queue.Queue[Optional[_PendingItem]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(self, sequence: str) -> Future:
+        item = _PendingItem(sequence=sequence)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="micro-batcher", daemon=True
+                )
+                self._worker.start()
+            self._queue.put(item)
+        return item.future
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            worker = self._worker
+            self._queue.put(None)
+        if worker is not None:
+            worker.join()
+
+    def _collect(self, first: _PendingItem) -> List[_PendingItem]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _flush(self, batch: List[_PendingItem]) -> None:
+        try:
+            results = self.run_batch([item.sequence for item in batch])
+        except Exception as exc:
+            self._fail(batch, exc)
+            return
+
+        # A Future lets the next batch be collected while this one is still running.
+        if isinstance(results, Future):
+            results.add_done_callback(lambda done: self._resolve(batch, done))
+            return
+        for item, result in zip(batch, results):
+            item.future.set_result(result)
+
+    def _resolve(self, batch: List[_PendingItem], done: Future) -> None:
+        exc = done.exception()
+        if exc is not None:
+            self._fail(batch, exc)
+            return
+        for item, result in zip(batch, done.result()):
+            item.future.set_result(result)
+
+    @staticmethod
+    def _fail(batch: List[_PendingItem], exc: BaseException) -> None:
+        for item in batch:
+            item.future.set_exception(exc)
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            self._flush(self._collect(first))
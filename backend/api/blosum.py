@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ml.protein_tokenizer import AMINO_ACIDS
+
+
+try:
+    from Bio.Align import substitution_matrices
+except Exception:
+    substitution_matrices = None
+
+
+BLOSUM_UNKNOWN_SCORE = -4
+
+
+def clean_residues(sequence: str) -> str:
+    return "".join(ch for ch in sequence.upper() if ch.isalpha())
+
+
+@lru_cache(maxsize=1)
+def load_blosum_table() -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    if substitution_matrices is None:
+        return None
+
+    blosum62 = substitution_matrices.load("BLOSUM62")
+    alphabet = blosum62.alphabet
+    unknown_idx = len(alphabet)
+
+    table = np.full((unknown_idx + 1, unknown_idx + 1), BLOSUM_UNKNOWN_SCORE, dtype=np.int8)
+    table[:unknown_idx, :unknown_idx] = np.asarray(blosum62, dtype=np.int8)
+
+    lookup = np.full(256, unknown_idx, dtype=np.intp)
+    for idx, letter in enumerate(alphabet):
+        lookup[ord(letter)] = idx
+    return lookup, table
+
+
+def residue_indices(clean_seq: str, lookup: np.ndarray) -> np.ndarray:
+    raw = clean_seq.encode("ascii", errors="replace")
+    return lookup[np.frombuffer(raw, dtype=np.uint8)]
+
+
+def blosum_score_block(clean_seq: str, rows: slice, cols: slice) -> np.ndarray:
+    blosum = load_blosum_table()
+    if blosum is None:
+        positions = np.arange(len(clean_seq))
+        return (positions[rows, None] == positions[None, cols]).astype(np.int8)
+
+    lookup, table = blosum
+    idx = residue_indices(clean_seq, lookup)
+    return table[idx[rows, None], idx[None, cols]]
+
+
+def blosum_score_array(clean_seq: str) -> np.ndarray:
+    return blosum_score_block(clean_seq, slice(None), slice(None))
+
+
+def build_blosum_matrix(sequence: str) -> Dict[str, List]:
+    clean_seq = clean_residues(sequence)
+    if not clean_seq:
+        return {"residues": [], "scores": []}
+
+    return {"residues": list(clean_seq), "scores": blosum_score_array(clean_seq).tolist()}
+
+
+def build_blosum_tile(sequence: str, row_offset: int, col_offset: int, tile_size: int) -> Dict[str, Any]:
+    clean_seq = clean_residues(sequence)
+    rows = slice(row_offset, row_offset + tile_size)
+    cols = slice(col_offset, col_offset + tile_size)
+    return {
+        "length": len(clean_seq),
+        "row_offset": row_offset,
+        "col_offset": col_offset,
+        "row_residues": list(clean_seq[rows]),
+        "col_residues": list(clean_seq[cols]),
+        "scores": blosum_score_block(clean_seq, rows, cols).tolist(),
+    }
+
+
+def build_blosum_summary(sequence: str) -> Dict[str, Any]:
+    clean_seq = clean_residues(sequence)
+    byte_counts = np.bincount(
+        np.frombuffer(clean_seq.encode("ascii", errors="replace"), dtype=np.uint8),
+        minlength=256,
+    )
+    amino_bytes = np.frombuffer("".join(AMINO_ACIDS).encode("ascii"), dtype=np.uint8)
+    counts = byte_counts[amino_bytes]
+
+    blosum = load_blosum_table()
+    if blosum is None:
+        scores = np.eye(len(AMINO_ACIDS), dtype=np.int8)
+    else:
+        lookup, table = blosum
+        idx = lookup[amino_bytes]
+        scores = table[idx[:, None], idx[None, :]]
+
+    return {
+        "length": len(clean_seq),
+        "residues": list(AMINO_ACIDS),
+        "counts": counts.tolist(),
+        "other_count": len(clean_seq) - int(counts.sum()),
+        "scores": scores.tolist(),
+    }
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+def file_fingerprint(paths: Iterable[Path]) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(str(path.name).encode("utf-8"))
+        with path.open("rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class LocalCacheBackend(CacheBackend):
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at and expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else 0.0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, value)
+            self.current_bytes += len(value)
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self.current_bytes -= len(value)
+
+
+class RedisCacheBackend(CacheBackend):
+    def __init__(self, url: str, ttl_seconds: float, prefix: str = "protein-api:"):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("The redis cache backend requires the 'redis' package") from exc
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self._redis_error = redis.RedisError
+
+    # The cache fails open: while Redis is unreachable, reads miss and writes are dropped.
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get(self.prefix + key)
+        except self._redis_error as exc:
+            logger.warning("Redis cache get failed, treating as a miss: %s", exc)
+            return None
+
+    def set(self, key: str, value: bytes) -> None:
+        ttl = int(self.ttl_seconds) if self.ttl_seconds > 0 else None
+        try:
+            self.client.set(self.prefix + key, value, ex=ttl)
+        except self._redis_error as exc:
+            logger.warning("Redis cache set failed, skipping: %s", exc)
+
+    def clear(self) -> None:
+        try:
+            for key in self.client.scan_iter(match=self.prefix + "*"):
+                self.client.delete(key)
+        except self._redis_error as exc:
+            logger.warning("Redis cache clear failed: %s", exc)
+
+
+class ResultCache:
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(fingerprint: str, clean_sequence: str) -> str:
+        digest = hashlib.sha256(clean_sequence.encode("utf-8")).hexdigest()
+        return f"{fingerprint}:{digest}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self.backend.get(key)
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self.backend.set(key, json.dumps(value).encode("utf-8"))
+
+    def invalidate(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats: Dict[str, Any] = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+        if isinstance(self.backend, LocalCacheBackend):
+            stats["entries"] = len(self.backend)
+            stats["bytes"] = self.backend.current_bytes
+        return stats
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import torch
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+def default_torch_threads(workers: int) -> int:
+    return max(1, (os.cpu_count() or 1) // max(workers, 1))
+
+
+def configure_worker(torch_threads: int, initializer: Optional[Callable[[], None]] = None) -> None:
+    torch.set_num_threads(torch_threads)
+    if initializer is not None:
+        initializer()
+
+
+class InferenceExecutor:
+    def __init__(
+        self,
+        kind: str,
+        workers: int,
+        max_queue_size: int,
+        torch_threads: int = 0,
+        initializer: Optional[Callable[[], None]] = None,
+    ):
+        if workers < 1 or max_queue_size < 1:
+            raise ValueError("workers and max_queue_size must be at least 1")
+        self.kind = kind
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.torch_threads = torch_threads or default_torch_threads(workers)
+        self.rejected = 0
+        self.completed = 0
+        self._pending = 0
+        self._slot_freed = threading.Condition()
+        self._initializer = initializer
+
+        if kind == "thread":
+            # Intra-op threads are process-wide, so thread workers share one setting.
+            configure_worker(self.torch_threads)
+            self._pool: Executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        elif kind == "process":
+            self._pool = self._process_pool()
+        else:
+            raise ValueError(f"Unknown executor kind: {kind}")
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=configure_worker,
+            initargs=(self.torch_threads, self._initializer),
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending
+
+    def submit(self, fn: Callable[..., Any], *args: Any, block: bool = False) -> Future:
+        """Queue ``fn(*args)``; raise QueueFullError when full unless ``block`` is set."""
+        with self._slot_freed:
+            if self._pending >= self.max_queue_size:
+                if not block:
+                    self.rejected += 1
+                    raise QueueFullError(f"Inference queue is full ({self.max_queue_size} pending)")
+                self._slot_freed.wait_for(lambda: self._pending < self.max_queue_size)
+            self._pending += 1
+
+        try:
+            future = self._pool.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release(completed=True))
+        return future
+
+    def start_workers(self) -> None:
+        if self.kind != "process":
+            return
+        # Process workers spawn lazily; run one no-op each so loading happens now.
+        for future in [self.submit(os.getpid, block=True) for _ in range(self.workers)]:
+            future.result()
+
+    def recycle(self) -> None:
+        if self.kind != "process":
+            return
+        # Process workers hold their own models. Fresh workers load and warm up before the
+        # swap, and jobs already queued finish on the old pool.
+        fresh = self._process_pool()
+        for future in [fresh.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+        previous, self._pool = self._pool, fresh
+        previous.shutdown(wait=False)
+
+    def _release(self, completed: bool = False) -> None:
+        with self._slot_freed:
+            self._pending -= 1
+            if completed:
+                self.completed += 1
+            self._slot_freed.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._slot_freed:
+            return {
+                "kind": self.kind,
+                "workers": self.workers,
+                "torch_threads": self.torch_threads,
+                "queue_depth": self._pending,
+                "max_queue_size": self.max_queue_size,
+                "rejected": self.rejected,
+                "completed": self.completed,
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
@@ -1,118 +1,814 @@
 from __future__ import annotations
 
 import json
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
 from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Literal, Optional, Tuple, Union
 
+import numpy as np
 import torch
+import torch.nn as nn
 import torch.nn.functional as F
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
+from starlette.datastructures import UploadFile
 
-from ml.basic_protein_model import BasicProteinClassifier
-from ml.protein_tokenizer import ProteinTokenizer
-
-
-try:
-    from Bio.Align import substitution_matrices
-except Exception:
-    substitution_matrices = None
+from api.batching import MicroBatcher
+from api.blosum import (
+    blosum_score_array,
+    build_blosum_matrix,
+    build_blosum_summary,
+    build_blosum_tile,
+    clean_residues,
+)
+from api.cache import LocalCacheBackend, RedisCacheBackend, ResultCache, file_fingerprint
+from api.executor import InferenceExecutor, QueueFullError
+from api.metrics import MetricsMiddleware, MetricsRegistry, stage_timer
+from api.settings import get_settings
+from ml.basic_protein_model import ProteinEncoder, build_classifier
+from ml.embedding_store import EmbeddingStore, sequence_digest
+from ml.inference_backends import (
+    LOGITS_OUTPUT,
+    EagerBackend,
+    InferenceBackend,
+    OnnxBackend,
+    TorchScriptBackend,
+    export_metadata_path,
+    load_export_metadata,
+    onnx_path,
+    torchscript_path,
+)
+from ml.precision import FP32, validate_precision
+from ml.protein_tokenizer import ProteinTokenizer, build_protein_vocab
+from ml.quantization import DYNAMIC_INT8, quantize_dynamic_int8, quantized_checkpoint_path
+from ml.windowing import WINDOW_AGGREGATIONS, aggregate_windows, encode_windows, resolve_window
+from utils.fasta import iter_fasta_records
 
 
 BACKEND_DIR = Path(__file__).resolve().parents[1]
 CHECKPOINT_PATH = BACKEND_DIR / "checkpoints" / "public_small" / "basic_protein_classifier.pt"
 TYPE_CHECKPOINT_PATH = BACKEND_DIR / "checkpoints" / "protein_type" / "basic_protein_classifier.pt"
+MULTI_TASK_CHECKPOINT_PATH = (
+    BACKEND_DIR / "checkpoints" / "multi_task" / "basic_protein_classifier.pt"
+)
 TYPE_LABEL_MAP_PATH = BACKEND_DIR / "data" / "processed" / "protein_type_label_map.json"
+ORGANISM_HEAD = "organism"
+PROTEIN_TYPE_HEAD = "protein_type"
 LABEL_MAP = {0: "human_swissprot", 1: "yeast_swissprot", 2: "ecoli_swissprot"}
+WARMUP_RESIDUES = "ACDEFGHIKLMNPQRSTVWY"
 
 
 class PredictRequest(BaseModel):
     sequence: str
+    blosum_mode: Literal["full", "summary", "none"] = "full"
 
 
-class ModelBundle:
-    def __init__(self):
-        checkpoint = torch.load(str(CHECKPOINT_PATH), map_location="cpu")
-        config = checkpoint["config"]
-        model_cfg = config["model"]
+class EmbedRecord(BaseModel):
+    id: Optional[str] = None
+    sequence: str
 
-        self.tokenizer = ProteinTokenizer(max_length=model_cfg["max_length"])
-        self.model = BasicProteinClassifier(
-            vocab_size=len(self.tokenizer.vocab.token_to_idx),
-            max_length=model_cfg["max_length"],
-            embedding_dim=model_cfg["embedding_dim"],
-            num_heads=model_cfg["num_heads"],
-            num_layers=model_cfg["num_layers"],
-            ff_dim=model_cfg["ff_dim"],
-            dropout=model_cfg["dropout"],
-            num_classes=model_cfg["num_classes"],
-            pad_id=self.tokenizer.vocab.pad_id,
+
+class EmbedRequest(BaseModel):
+    sequences: List[Union[str, EmbedRecord]]
+
+
+class BlosumRequest(BaseModel):
+    sequence: str
+    mode: Literal["tile", "summary", "binary"] = "tile"
+    row_offset: int = Field(default=0, ge=0)
+    col_offset: int = Field(default=0, ge=0)
+    tile_size: int = Field(default=32, ge=1, le=512)
+
+
+def load_classifier(
+    path: Path,
+    pad_id: int,
+    vocab_size: int,
+    quantize: bool = False,
+    attention: Optional[str] = None,
+) -> Tuple[ProteinEncoder, Dict[str, Any], Path]:
+    if quantize and quantized_checkpoint_path(path).exists():
+        path = quantized_checkpoint_path(path)
+
+    # Memory-map the checkpoint and adopt its tensors as parameters, so workers
+    # serving the same file share the page cache instead of private copies.
+    checkpoint = torch.load(str(path), map_location="cpu", mmap=True)
+    model_cfg = checkpoint["config"]["model"]
+    build_cfg = {**model_cfg, "attention": attention} if attention else model_cfg
+    model = build_classifier(build_cfg, vocab_size=vocab_size, pad_id=pad_id)
+    is_quantized = checkpoint.get("quantization") == DYNAMIC_INT8
+    if is_quantized:
+        model = quantize_dynamic_int8(model)
+    model.load_state_dict(checkpoint["model_state_dict"], assign=not is_quantized)
+    if quantize and not is_quantized:
+        model = quantize_dynamic_int8(model)
+    model.eval()
+    return model, model_cfg, path
+
+
+def load_inference_backend(
+    path: Path,
+    pad_id: int,
+    vocab_size: int,
+) -> Tuple[InferenceBackend, Dict[str, Any], List[Path]]:
+    settings = get_settings()
+    kind = settings.inference_backend
+    if validate_precision(settings.precision) != FP32 and (kind != "eager" or settings.quantize):
+        raise ValueError(f"precision={settings.precision} needs the unquantized eager backend")
+    if kind == "eager":
+        model, model_cfg, model_path = load_classifier(
+            path, pad_id, vocab_size, quantize=settings.quantize, attention=settings.attention
         )
-        self.model.load_state_dict(checkpoint["model_state_dict"])
-        self.model.eval()
+        return EagerBackend(model, settings.precision), model_cfg, [model_path]
+
+    metadata = load_export_metadata(path)
+    if kind == "torchscript":
+        artifact = torchscript_path(path)
+        backend: InferenceBackend = TorchScriptBackend(artifact, metadata["output_names"])
+    elif kind == "onnx":
+        artifact = onnx_path(path)
+        backend = OnnxBackend(artifact, metadata["output_names"])
+    else:
+        raise ValueError(f"Unknown inference backend: {kind}")
+
+    artifact_paths = [artifact, export_metadata_path(path)]
+    external_data = artifact.with_name(artifact.name + ".data")
+    if external_data.exists():
+        artifact_paths.append(external_data)
+    return backend, metadata["model"], artifact_paths
+
 
-        self.type_model: Optional[BasicProteinClassifier] = None
+class ModelBundle:
+    def __init__(self):
+        settings = get_settings()
+        vocab = build_protein_vocab()
+        vocab_size = len(vocab.token_to_idx)
+
+        self.model: Optional[nn.Module] = None
+        self.type_model: Optional[nn.Module] = None
+        self.heads: Dict[str, Tuple[InferenceBackend, str]] = {}
         self.type_label_map: Dict[int, str] = {}
 
-        if TYPE_CHECKPOINT_PATH.exists() and TYPE_LABEL_MAP_PATH.exists():
-            type_checkpoint = torch.load(str(TYPE_CHECKPOINT_PATH), map_location="cpu")
-            type_cfg = type_checkpoint["config"]["model"]
-            self.type_model = BasicProteinClassifier(
-                vocab_size=len(self.tokenizer.vocab.token_to_idx),
-                max_length=type_cfg["max_length"],
-                embedding_dim=type_cfg["embedding_dim"],
-                num_heads=type_cfg["num_heads"],
-                num_layers=type_cfg["num_layers"],
-                ff_dim=type_cfg["ff_dim"],
-                dropout=type_cfg["dropout"],
-                num_classes=type_cfg["num_classes"],
-                pad_id=self.tokenizer.vocab.pad_id,
+        if MULTI_TASK_CHECKPOINT_PATH.exists():
+            backend, model_cfg, loaded_paths = load_inference_backend(
+                MULTI_TASK_CHECKPOINT_PATH, vocab.pad_id, vocab_size
             )
-            self.type_model.load_state_dict(type_checkpoint["model_state_dict"])
-            self.type_model.eval()
+            if ORGANISM_HEAD not in backend.output_names:
+                raise ValueError(
+                    f"{MULTI_TASK_CHECKPOINT_PATH} must define an '{ORGANISM_HEAD}' head"
+                )
+            for head in (ORGANISM_HEAD, PROTEIN_TYPE_HEAD):
+                if head in backend.output_names:
+                    self.heads[head] = (backend, head)
+            encoder_paths = list(loaded_paths)
+        else:
+            backend, model_cfg, loaded_paths = load_inference_backend(
+                CHECKPOINT_PATH, vocab.pad_id, vocab_size
+            )
+            encoder_paths = list(loaded_paths)
+            self.heads[ORGANISM_HEAD] = (backend, LOGITS_OUTPUT)
+            if TYPE_CHECKPOINT_PATH.exists() and TYPE_LABEL_MAP_PATH.exists():
+                type_backend, _, type_paths = load_inference_backend(
+                    TYPE_CHECKPOINT_PATH, vocab.pad_id, vocab_size
+                )
+                self.heads[PROTEIN_TYPE_HEAD] = (type_backend, LOGITS_OUTPUT)
+                loaded_paths.extend(type_paths)
+                if isinstance(type_backend, EagerBackend):
+                    self.type_model = type_backend.model
+
+        # Embeddings come from the organism encoder, which the multi-task checkpoint shares.
+        self.embedder: Optional[EagerBackend] = None
+        if isinstance(backend, EagerBackend):
+            self.model = backend.model
+            self.embedder = backend
+        self.embedding_dim: int = model_cfg["embedding_dim"]
 
+        self.tokenizer = ProteinTokenizer(
+            max_length=model_cfg["max_length"],
+            length_bucket=settings.length_bucket,
+        )
+
+        if PROTEIN_TYPE_HEAD in self.heads and TYPE_LABEL_MAP_PATH.exists():
             raw_label_map = json.loads(TYPE_LABEL_MAP_PATH.read_text(encoding="utf-8"))
             self.type_label_map = {int(idx): name for idx, name in raw_label_map.items()}
+            loaded_paths.append(TYPE_LABEL_MAP_PATH)
+        else:
+            self.heads.pop(PROTEIN_TYPE_HEAD, None)
+
+        quantized = settings.quantize and settings.inference_backend == "eager"
+        variant = "-int8" if quantized else ""
+        if settings.precision != FP32:
+            variant += f"-{settings.precision}"
+        self.fingerprint = file_fingerprint(loaded_paths) + variant
+        self.embedding_fingerprint = file_fingerprint(encoder_paths) + variant
+
+        # (window, stride) for sliding-window inference over sequences longer than max_length.
+        self.window: Optional[Tuple[int, int]] = None
+        self.window_aggregation = settings.window_aggregation
+        self.window_batch_size = max(settings.window_batch_size, 1)
+        if settings.windowed_inference:
+            if self.window_aggregation not in WINDOW_AGGREGATIONS:
+                raise ValueError(f"Unknown window aggregation: {self.window_aggregation}")
+            size, stride = resolve_window(
+                settings.window_size, settings.window_stride, model_cfg["max_length"]
+            )
+            self.window = (size, stride)
+            self.fingerprint += f"-w{size}s{stride}-{self.window_aggregation}"
+            self.embedding_fingerprint += f"-w{size}s{stride}"
+
+    @property
+    def can_embed(self) -> bool:
+        return self.embedder is not None
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "embedding_fingerprint": self.embedding_fingerprint,
+            "embedding_dim": self.embedding_dim,
+            "max_length": self.tokenizer.max_length,
+            "can_embed": self.can_embed,
+        }
+
+    def forward(
+        self,
+        input_ids: torch.Tensor,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, torch.Tensor]:
+        backend_outputs: Dict[int, Dict[str, torch.Tensor]] = {}
+        outputs = {}
+        for head, (backend, output_name) in self.heads.items():
+            if id(backend) not in backend_outputs:
+                start = time.perf_counter()
+                backend_outputs[id(backend)] = backend(input_ids)
+                if timings is not None:
+                    timings[f"forward_{head}"] = time.perf_counter() - start
+            outputs[head] = backend_outputs[id(backend)][output_name]
+        return outputs
+
+    def forward_windows(
+        self,
+        input_ids: torch.Tensor,
+        owners: torch.Tensor,
+        lengths: torch.Tensor,
+        count: int,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, torch.Tensor]:
+        backend_outputs: Dict[int, Dict[str, torch.Tensor]] = {}
+        outputs = {}
+        for head, (backend, output_name) in self.heads.items():
+            if id(backend) not in backend_outputs:
+                start = time.perf_counter()
+                backend_outputs[id(backend)] = self._aggregate_backend(
+                    backend, input_ids, owners, lengths, count
+                )
+                if timings is not None:
+                    timings[f"forward_{head}"] = time.perf_counter() - start
+            outputs[head] = backend_outputs[id(backend)][output_name]
+        return outputs
+
+    def _aggregate_backend(
+        self,
+        backend: InferenceBackend,
+        input_ids: torch.Tensor,
+        owners: torch.Tensor,
+        lengths: torch.Tensor,
+        count: int,
+    ) -> Dict[str, torch.Tensor]:
+        per_window = [
+            backend(input_ids[start : start + self.window_batch_size])
+            for start in range(0, input_ids.size(0), self.window_batch_size)
+        ]
+        outputs = {}
+        for name in per_window[0]:
+            logits = torch.cat([out[name] for out in per_window])
+            if self.window_aggregation == "mean_probs":
+                # Log of the mean probabilities, so the softmax downstream returns that mean.
+                probs = aggregate_windows(F.softmax(logits, dim=-1), owners, lengths, count)
+                outputs[name] = probs.clamp(min=torch.finfo(probs.dtype).tiny).log()
+            else:
+                outputs[name] = aggregate_windows(logits, owners, lengths, count)
+        return outputs
+
+
+class ModelBundleView:
+    """The tokenizer and fingerprints of a bundle that process workers hold, without its models."""
+
+    def __init__(self, description: Dict[str, Any]):
+        self.fingerprint: str = description["fingerprint"]
+        self.embedding_fingerprint: str = description["embedding_fingerprint"]
+        self.embedding_dim: int = description["embedding_dim"]
+        self.can_embed: bool = description["can_embed"]
+        self.tokenizer = ProteinTokenizer(
+            max_length=description["max_length"],
+            length_bucket=get_settings().length_bucket,
+        )
+
+
+RequestBundle = Union[ModelBundle, ModelBundleView]
+
+
+_bundle_lock = threading.Lock()
+_ready = threading.Event()
+_warmup_status: Dict[str, Any] = {"state": "pending"}
+
+
+_model_bundle: Optional[ModelBundle] = None
 
 
-@lru_cache(maxsize=1)
 def get_model_bundle() -> ModelBundle:
-    return ModelBundle()
+    global _model_bundle
+    # Requests arriving during startup wait for the background load instead of
+    # loading a second copy.
+    with _bundle_lock:
+        if _model_bundle is None:
+            _model_bundle = ModelBundle()
+        return _model_bundle
+
+
+@lru_cache(maxsize=1)
+def _load_bundle_view() -> ModelBundleView:
+    return ModelBundleView(get_executor().submit(describe_bundle_job, block=True).result())
+
+
+def get_request_bundle() -> RequestBundle:
+    # Process workers hold the models, so the API process keeps only what routing needs
+    # (tokenizer and fingerprints) rather than a full extra model copy.
+    if get_settings().executor != "process":
+        return get_model_bundle()
+    with _bundle_lock:
+        return _load_bundle_view()
+
+
+@lru_cache(maxsize=1)
+def get_result_cache() -> Optional[ResultCache]:
+    settings = get_settings()
+    if not settings.cache_enabled:
+        return None
+    if settings.cache_backend == "redis":
+        backend = RedisCacheBackend(
+            settings.cache_redis_url, ttl_seconds=settings.cache_ttl_seconds
+        )
+    elif settings.cache_backend == "local":
+        backend = LocalCacheBackend(
+            max_entries=settings.cache_max_entries,
+            max_bytes=settings.cache_max_bytes,
+            ttl_seconds=settings.cache_ttl_seconds,
+        )
+    else:
+        raise ValueError(f"Unknown cache backend: {settings.cache_backend}")
+    return ResultCache(backend)
+
+
+def reload_model_bundle() -> RequestBundle:
+    global _model_bundle
+    settings = get_settings()
+    start = time.perf_counter()
+    # The old models keep serving until the new ones are loaded and warmed up.
+    if settings.executor == "process":
+        get_executor().recycle()
+        with _bundle_lock:
+            _load_bundle_view.cache_clear()
+        bundle: RequestBundle = get_request_bundle()
+        loaded = time.perf_counter()
+        buckets = warmup_buckets(bundle.tokenizer, settings.warmup_lengths)
+    else:
+        fresh = ModelBundle()
+        loaded = time.perf_counter()
+        buckets = warm_up(fresh, settings.warmup_lengths, sorted({1, settings.max_batch_size}))
+        with _bundle_lock:
+            _model_bundle = bundle = fresh
+    _set_warmup_status(bundle, start, loaded, buckets)
+    cache = get_result_cache()
+    if cache is not None:
+        cache.invalidate()
+    return bundle
+
+
+def format_prediction(probs: List[float], label_map: Dict[int, str]) -> Dict[str, Any]:
+    pred_idx = max(range(len(probs)), key=probs.__getitem__)
+    return {
+        "predicted_label": label_map.get(pred_idx, str(pred_idx)),
+        "confidence": probs[pred_idx],
+        "class_probabilities": {
+            label_map.get(i, str(i)): prob for i, prob in enumerate(probs)
+        },
+    }
+
+
+def run_inference(
+    bundle: ModelBundle,
+    sequences: List[str],
+    timings: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    start = time.perf_counter()
+    if bundle.window is not None:
+        input_ids, owners, lengths = bundle.tokenizer.batch_encode_windows(
+            sequences, *bundle.window
+        )
+    else:
+        input_ids = bundle.tokenizer.batch_encode(sequences, dynamic_padding=True)
+    tokenized = time.perf_counter()
+
+    with torch.no_grad():
+        if bundle.window is not None:
+            outputs = bundle.forward_windows(input_ids, owners, lengths, len(sequences), timings)
+        else:
+            outputs = bundle.forward(input_ids, timings)
+        forwarded = time.perf_counter()
+        probs = F.softmax(outputs[ORGANISM_HEAD], dim=-1).tolist()
+        type_probs: List[Optional[List[float]]] = [None] * len(sequences)
+        if PROTEIN_TYPE_HEAD in outputs:
+            type_probs = F.softmax(outputs[PROTEIN_TYPE_HEAD], dim=-1).tolist()
+
+    results = []
+    for organism_row, type_row in zip(probs, type_probs):
+        result = format_prediction(organism_row, LABEL_MAP)
+        result["protein_type_prediction"] = (
+            format_prediction(type_row, bundle.type_label_map) if type_row is not None else None
+        )
+        results.append(result)
+
+    if timings is not None:
+        timings["tokenize"] = tokenized - start
+        timings["postprocess"] = time.perf_counter() - forwarded
+    return results
+
+
+def run_embedding(bundle: ModelBundle, sequences: List[str]) -> np.ndarray:
+    if bundle.embedder is None:
+        raise ValueError("Embeddings need the eager inference backend")
+    with torch.no_grad():
+        if bundle.window is not None:
+            input_ids, owners, lengths = bundle.tokenizer.batch_encode_windows(
+                sequences, *bundle.window
+            )
+            pooled = encode_windows(
+                bundle.embedder.encode,
+                input_ids,
+                owners,
+                lengths,
+                len(sequences),
+                bundle.window_batch_size,
+            )
+        else:
+            input_ids = bundle.tokenizer.batch_encode(sequences, dynamic_padding=True)
+            pooled = bundle.embedder.encode(input_ids)
+    return pooled.numpy()
+
+
+@lru_cache(maxsize=1)
+def get_embedding_store(bundle: RequestBundle) -> Optional[EmbeddingStore]:
+    settings = get_settings()
+    if not settings.embedding_store_dir:
+        return None
+    return EmbeddingStore(
+        Path(settings.embedding_store_dir),
+        bundle.embedding_fingerprint,
+        dim=bundle.embedding_dim,
+        dtype=settings.embedding_dtype,
+    )
+
+
+def embed_with_store(
+    bundle: RequestBundle,
+    sequences: List[str],
+    infer: Callable[[List[str]], np.ndarray],
+) -> Tuple[np.ndarray, List[bool]]:
+    store = get_embedding_store(bundle)
+    if store is None:
+        return infer(sequences), [False] * len(sequences)
+
+    digests = [sequence_digest(bundle.tokenizer.clean_sequence(sequence)) for sequence in sequences]
+    vectors = store.get_many(digests)
+    stored = [vector is not None for vector in vectors]
+    missing = [idx for idx, found in enumerate(stored) if not found]
+    if missing:
+        computed = infer([sequences[idx] for idx in missing]).astype(store.dtype)
+        store.append([digests[idx] for idx in missing], computed)
+        for idx, vector in zip(missing, computed):
+            vectors[idx] = vector
+    return np.stack(vectors), stored
+
+
+def predict_with_cache(
+    bundle: RequestBundle,
+    sequences: List[str],
+    infer: Callable[[List[str]], List[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    cache = get_result_cache()
+    if cache is None:
+        return infer(sequences)
+
+    keys = [
+        cache.make_key(bundle.fingerprint, bundle.tokenizer.clean_sequence(sequence))
+        for sequence in sequences
+    ]
+    results: List[Optional[Dict[str, Any]]] = [cache.get(key) for key in keys]
+    missing = [idx for idx, result in enumerate(results) if result is None]
+    if missing:
+        computed = infer([sequences[idx] for idx in missing])
+        for idx, result in zip(missing, computed):
+            cache.set(keys[idx], result)
+            results[idx] = result
+    return results
+
+
+def run_inference_job(sequences: List[str]) -> List[Dict[str, Any]]:
+    return run_inference(get_model_bundle(), sequences)
+
+
+def run_timed_inference_job(sequences: List[str]) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+    # Timings travel back with the results so process workers report them too.
+    timings: Dict[str, float] = {}
+    return run_inference(get_model_bundle(), sequences, timings), timings
+
+
+def run_embedding_job(sequences: List[str]) -> np.ndarray:
+    return run_embedding(get_model_bundle(), sequences)
+
 
+def describe_bundle_job() -> Dict[str, Any]:
+    return get_model_bundle().describe()
 
-def build_blosum_matrix(sequence: str) -> Dict[str, List]:
-    clean_seq = "".join(ch for ch in sequence.upper() if ch.isalpha())
-    if not clean_seq:
-        return {"residues": [], "scores": []}
 
-    residues = list(clean_seq)
+def warm_up_worker() -> None:
+    warm_up(get_model_bundle(), get_settings().warmup_lengths, [1])
 
-    if substitution_matrices is None:
-        size = len(residues)
-        scores = [[1 if i == j else 0 for j in range(size)] for i in range(size)]
-        return {"residues": residues, "scores": scores}
 
-    blosum62 = substitution_matrices.load("BLOSUM62")
-    scores = []
-    for a in residues:
-        row = []
-        for b in residues:
+@lru_cache(maxsize=1)
+def get_executor() -> InferenceExecutor:
+    settings = get_settings()
+    return InferenceExecutor(
+        kind=settings.executor,
+        workers=settings.executor_workers,
+        max_queue_size=settings.max_queue_size,
+        torch_threads=settings.torch_threads,
+        initializer=warm_up_worker if settings.eager_load else None,
+    )
+
+
+def submit_inference(sequences: List[str], block: bool = False) -> Future:
+    metrics = get_metrics()
+    if metrics is None:
+        return get_executor().submit(run_inference_job, sequences, block=block)
+
+    tokenizer = get_request_bundle().tokenizer
+    lengths = [len(tokenizer.clean_sequence(sequence)) for sequence in sequences]
+    metrics.batch_size.observe(len(sequences))
+    metrics.sequence_length.observe_many(lengths)
+    metrics.padded_length.observe(tokenizer.padded_length(max(lengths, default=0)))
+
+    submitted = time.perf_counter()
+    job = get_executor().submit(run_timed_inference_job, sequences, block=block)
+    result: Future = Future()
+
+    def _record(done: Future) -> None:
+        exc = done.exception()
+        if exc is not None:
+            result.set_exception(exc)
+            return
+        results, timings = done.result()
+        timings["inference"] = time.perf_counter() - submitted
+        metrics.observe_stages(timings)
+        result.set_result(results)
+
+    job.add_done_callback(_record)
+    return result
+
+
+@lru_cache(maxsize=1)
+def get_batcher() -> MicroBatcher:
+    settings = get_settings()
+    return MicroBatcher(
+        run_batch=submit_inference,
+        max_batch_size=settings.max_batch_size,
+        max_wait_ms=settings.max_wait_ms,
+    )
+
+
+def infer_online(sequences: List[str]) -> List[Dict[str, Any]]:
+    if not get_settings().batching_enabled:
+        return submit_inference(sequences).result()
+    futures = [get_batcher().submit(sequence) for sequence in sequences]
+    return [future.result() for future in futures]
+
+
+def infer_bulk(sequences: List[str]) -> List[Dict[str, Any]]:
+    # Bulk streams cannot turn into a 503 mid-response, so they wait for a slot.
+    return submit_inference(sequences, block=True).result()
+
+
+def infer_embeddings(sequences: List[str]) -> np.ndarray:
+    # Embedding requests are bulk work: chunk them and wait for slots rather than answer 503.
+    chunk_size = get_settings().batch_chunk_size
+    futures = [
+        get_executor().submit(run_embedding_job, sequences[start : start + chunk_size], block=True)
+        for start in range(0, len(sequences), chunk_size)
+    ]
+    return np.concatenate([future.result() for future in futures])
+
+
+def _cache_stat(name: str) -> float:
+    cache = get_result_cache()
+    return cache.stats()[name] if cache is not None else 0
+
+
+@lru_cache(maxsize=1)
+def get_metrics() -> Optional[MetricsRegistry]:
+    if not get_settings().metrics_enabled:
+        return None
+    registry = MetricsRegistry()
+    registry.callback(
+        "cache_hits_total", "Result cache hits", lambda: _cache_stat("hits"), kind="counter"
+    )
+    registry.callback(
+        "cache_misses_total", "Result cache misses", lambda: _cache_stat("misses"), kind="counter"
+    )
+    registry.callback(
+        "cache_hit_ratio", "Result cache hit rate since startup", lambda: _cache_stat("hit_rate")
+    )
+    registry.callback(
+        "inference_queue_depth",
+        "Inference jobs queued or running",
+        lambda: get_executor().queue_depth,
+    )
+    registry.callback(
+        "inference_rejected_total",
+        "Inference jobs rejected because the queue was full",
+        lambda: get_executor().rejected,
+        kind="counter",
+    )
+    registry.callback(
+        "ready", "1 once models are loaded and warmed up", lambda: float(_ready.is_set())
+    )
+    return registry
+
+
+def warmup_buckets(tokenizer: ProteinTokenizer, lengths: Iterable[int]) -> List[int]:
+    return sorted({tokenizer.padded_length(length) for length in lengths})
+
+
+def warm_up(bundle: ModelBundle, lengths: Iterable[int], batch_sizes: Iterable[int]) -> List[int]:
+    buckets = warmup_buckets(bundle.tokenizer, lengths)
+    for length in buckets:
+        sequence = (WARMUP_RESIDUES * (length // len(WARMUP_RESIDUES) + 1))[:length]
+        for batch_size in batch_sizes:
+            run_inference(bundle, [sequence] * batch_size)
+    return buckets
+
+
+def load_and_warm_up() -> None:
+    settings = get_settings()
+    start = time.perf_counter()
+    try:
+        if settings.executor == "process":
+            # Each worker loads and warms its own models as it starts.
+            get_executor().start_workers()
+            bundle = get_request_bundle()
+            loaded = time.perf_counter()
+            buckets = warmup_buckets(bundle.tokenizer, settings.warmup_lengths)
+        else:
+            bundle = get_model_bundle()
+            loaded = time.perf_counter()
+            buckets = warm_up(bundle, settings.warmup_lengths, sorted({1, settings.max_batch_size}))
+        if settings.batching_enabled:
+            get_batcher()
+    except Exception as exc:
+        _warmup_status.update(state="failed", error=f"{type(exc).__name__}: {exc}")
+        raise
+    _set_warmup_status(bundle, start, loaded, buckets)
+    _ready.set()
+
+
+def _set_warmup_status(
+    bundle: RequestBundle, start: float, loaded: float, buckets: List[int]
+) -> None:
+    _warmup_status.update(
+        state="ready",
+        fingerprint=bundle.fingerprint,
+        load_ms=(loaded - start) * 1000.0,
+        warmup_ms=(time.perf_counter() - loaded) * 1000.0,
+        warmup_lengths=buckets,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if get_settings().eager_load:
+        threading.Thread(target=load_and_warm_up, name="model-warmup", daemon=True).start()
+    else:
+        _warmup_status.update(state="lazy")
+        _ready.set()
+    yield
+    if get_settings().batching_enabled:
+        get_batcher().close()
+    get_executor().shutdown()
+
+
+def iter_batch_predictions(
+    bundle: RequestBundle,
+    records: Iterable[Tuple[str, str]],
+    chunk_size: int,
+) -> Iterator[bytes]:
+    record_iter = iter(records)
+    while True:
+        chunk = list(islice(record_iter, chunk_size))
+        if not chunk:
+            return
+
+        # Sequences that clean to no residues would hand the encoder an empty row.
+        sequences = [seq.strip().upper() for _, seq in chunk]
+        has_residues = [bool(bundle.tokenizer.clean_sequence(seq)) for seq in sequences]
+        valid = [seq for seq, usable in zip(sequences, has_residues) if usable]
+        predictions: Iterator[Dict[str, Any]] = iter(())
+        chunk_error = None
+        if valid:
             try:
-                value = blosum62[(a, b)]
-            except Exception:
-                try:
-                    value = blosum62[(b, a)]
-                except Exception:
-                    value = -4
-            row.append(int(value))
-        scores.append(row)
+                predictions = iter(predict_with_cache(bundle, valid, infer_bulk))
+            except Exception as exc:
+                # The status line is already sent, so a failed chunk is reported per record.
+                chunk_error = f"Prediction failed: {exc}"
+        for (record_id, _), sequence, usable in zip(chunk, sequences, has_residues):
+            if not sequence:
+                line = {"id": record_id, "error": "Sequence is required"}
+            elif not usable:
+                line = {"id": record_id, "error": "Sequence has no amino-acid residues"}
+            elif chunk_error is not None:
+                line = {"id": record_id, "error": chunk_error}
+            else:
+                line = {"id": record_id, **next(predictions)}
+            yield (json.dumps(line) + "\n").encode("utf-8")
+
 
-    return {"residues": residues, "scores": scores}
+def _stream_batch_predictions(
+    records: Iterable[Tuple[str, str]],
+    chunk_size: int,
+) -> Iterator[bytes]:
+    # StreamingResponse drives sync iterators on its threadpool, so a lazy model load here
+    # never blocks the event loop (and with it /ready and /metrics).
+    yield from iter_batch_predictions(get_request_bundle(), records, chunk_size)
 
 
-app = FastAPI(title="ProteinLLMV1 Demo")
+def _iter_upload_lines(upload: UploadFile) -> Iterator[str]:
+    upload.file.seek(0)
+    for raw_line in upload.file:
+        yield raw_line.decode("utf-8", errors="replace")
+
+
+def _fasta_upload_records(upload: UploadFile) -> Iterator[Tuple[str, str]]:
+    for index, (header, sequence) in enumerate(iter_fasta_records(_iter_upload_lines(upload))):
+        record_id = header.split()[0] if header else str(index)
+        yield record_id, sequence
+
+
+async def _read_capped_body(request: Request, max_bytes: int) -> bytes:
+    # A JSON body is parsed whole, so only FASTA uploads stream with bounded memory.
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"JSON bodies are limited to {max_bytes} bytes; upload large sets as FASTA",
+    )
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes:
+        raise too_large
+    body = bytearray()
+    async for part in request.stream():
+        body.extend(part)
+        if len(body) > max_bytes:
+            raise too_large
+    return bytes(body)
+
+
+def _json_records(payload: Any) -> List[Tuple[str, str]]:
+    if isinstance(payload, dict):
+        payload = payload.get("sequences")
+    if not isinstance(payload, list):
+        raise HTTPException(
+            status_code=400,
+            detail="Expected a JSON list of sequences or an object with a 'sequences' list",
+        )
+
+    records: List[Tuple[str, str]] = []
+    for index, item in enumerate(payload):
+        if isinstance(item, str):
+            records.append((str(index), item))
+        elif isinstance(item, dict) and isinstance(item.get("sequence"), str):
+            record_id = item.get("id")
+            records.append((str(index if record_id is None else record_id), item["sequence"]))
+        else:
+            raise HTTPException(status_code=400, detail=f"Invalid sequence entry at index {index}")
+    return records
+
+
+app = FastAPI(title="ProteinLLMV1 Demo", lifespan=lifespan)
+if get_metrics() is not None:
+    app.add_middleware(MetricsMiddleware, registry=get_metrics())
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -165,11 +861,20 @@ def index() -> str:
         <span>Positive</span>
       </div>
       <p class="muted">Red = negative substitution score, blue = positive score.</p>
+      <div class="row">
+        <button onclick="moveTile(-1, 0)">Up</button>
+        <button onclick="moveTile(1, 0)">Down</button>
+        <button onclick="moveTile(0, -1)">Left</button>
+        <button onclick="moveTile(0, 1)">Right</button>
+      </div>
+      <div class="status" id="tile-status"></div>
       <div id="matrix"></div>
     </div>
 
     <script>
+      const TILE_SIZE = 32;
       let predictTimer = null;
+      let tileState = { sequence: '', length: 0, row: 0, col: 0 };
 
       function setStatus(text) {
         document.getElementById('status').textContent = text;
@@ -184,6 +889,8 @@ def index() -> str:
         document.getElementById('seq').value = '';
         document.getElementById('summary').innerHTML = '';
         document.getElementById('matrix').innerHTML = '';
+        document.getElementById('tile-status').textContent = '';
+        tileState = { sequence: '', length: 0, row: 0, col: 0 };
         setStatus('Cleared.');
       }
 
@@ -220,7 +927,7 @@ def index() -> str:
         const res = await fetch('/predict', {
           method: 'POST',
           headers: {'Content-Type': 'application/json'},
-          body: JSON.stringify({ sequence })
+          body: JSON.stringify({ sequence, blosum_mode: 'none' })
         });
 
         if (!res.ok) {
@@ -257,20 +964,60 @@ def index() -> str:
           ${typeBlock}
         `;
 
-        const residues = data.blosum_matrix.residues;
-        const scores = data.blosum_matrix.scores;
-        let html = '<table><tr><th></th>' + residues.map(r => `<th>${r}</th>`).join('') + '</tr>';
-        for (let i = 0; i < residues.length; i++) {
-          html += `<tr><th>${residues[i]}</th>`;
-          for (let j = 0; j < residues.length; j++) {
-            const score = scores[i][j];
+        tileState = { sequence, length: 0, row: 0, col: 0 };
+        await loadTile();
+        setStatus('Prediction complete.');
+      }
+
+      function moveTile(rowStep, colStep) {
+        if (!tileState.sequence) return;
+        const maxOffset = Math.max(0, Math.floor((tileState.length - 1) / TILE_SIZE) * TILE_SIZE);
+        tileState.row = Math.min(Math.max(0, tileState.row + rowStep * TILE_SIZE), maxOffset);
+        tileState.col = Math.min(Math.max(0, tileState.col + colStep * TILE_SIZE), maxOffset);
+        loadTile();
+      }
+
+      async function loadTile() {
+        const res = await fetch('/blosum', {
+          method: 'POST',
+          headers: {'Content-Type': 'application/json'},
+          body: JSON.stringify({
+            sequence: tileState.sequence,
+            mode: 'tile',
+            row_offset: tileState.row,
+            col_offset: tileState.col,
+            tile_size: TILE_SIZE
+          })
+        });
+        if (!res.ok) {
+          document.getElementById('tile-status').textContent = 'Matrix tile failed to load.';
+          return;
+        }
+
+        const tile = await res.json();
+        tileState.length = tile.length;
+        const rowResidues = tile.row_residues;
+        const colResidues = tile.col_residues;
+        const header = colResidues
+          .map((r, j) => `<th title="${tile.col_offset + j + 1}">${r}</th>`)
+          .join('');
+        let html = '<table><tr><th></th>' + header + '</tr>';
+        for (let i = 0; i < rowResidues.length; i++) {
+          html += `<tr><th title="${tile.row_offset + i + 1}">${rowResidues[i]}</th>`;
+          for (let j = 0; j < colResidues.length; j++) {
+            const score = tile.scores[i][j];
             html += `<td style="background:${scoreColor(score)}">${score}</td>`;
           }
           html += '</tr>';
         }
         html += '</table>';
         document.getElementById('matrix').innerHTML = html;
-        setStatus('Prediction complete.');
+
+        const rowEnd = tile.row_offset + rowResidues.length;
+        const colEnd = tile.col_offset + colResidues.length;
+        const rows = `Rows ${tile.row_offset + 1}-${rowEnd}`;
+        const cols = `columns ${tile.col_offset + 1}-${colEnd}`;
+        document.getElementById('tile-status').textContent = `${rows}, ${cols} of ${tile.length}`;
       }
 
       document.getElementById('seq').addEventListener('input', debouncePredict);
@@ -293,39 +1040,148 @@ def predict(payload: PredictRequest):
     if not sequence:
         raise HTTPException(status_code=400, detail="Sequence is required")
 
-    bundle = get_model_bundle()
-    input_ids = torch.tensor([bundle.tokenizer.encode(sequence)], dtype=torch.long)
+    bundle = get_request_bundle()
+    # Reject before queueing, so an empty row never reaches a coalesced batch.
+    if not bundle.tokenizer.clean_sequence(sequence):
+        raise HTTPException(status_code=400, detail="Sequence has no amino-acid residues")
+    try:
+        result = predict_with_cache(bundle, [sequence], infer_online)[0]
+    except QueueFullError as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"})
+    response = dict(result)
+    metrics = get_metrics()
+    if payload.blosum_mode == "full":
+        with stage_timer(metrics, "blosum"):
+            response["blosum_matrix"] = build_blosum_matrix(sequence)
+    elif payload.blosum_mode == "summary":
+        with stage_timer(metrics, "blosum"):
+            response["blosum_summary"] = build_blosum_summary(sequence)
+    with stage_timer(metrics, "serialize"):
+        return JSONResponse(content=response)
 
-    with torch.no_grad():
-        logits = bundle.model(input_ids)
-        probs = F.softmax(logits, dim=-1).squeeze(0)
 
-    pred_idx = int(torch.argmax(probs).item())
-    class_probs = {
-        LABEL_MAP[i]: float(probs[i].item())
-        for i in range(probs.shape[0])
-    }
+@app.get("/ready")
+def ready():
+    if not _ready.is_set():
+        return JSONResponse(status_code=503, content={"ready": False, **_warmup_status})
+    return {"ready": True, **_warmup_status}
 
-    protein_type_prediction = None
-    if bundle.type_model is not None and bundle.type_label_map:
-      with torch.no_grad():
-        type_logits = bundle.type_model(input_ids)
-        type_probs = F.softmax(type_logits, dim=-1).squeeze(0)
-      type_pred_idx = int(torch.argmax(type_probs).item())
-      type_class_probs = {
-        bundle.type_label_map.get(i, str(i)): float(type_probs[i].item())
-        for i in range(type_probs.shape[0])
-      }
-      protein_type_prediction = {
-        "predicted_label": bundle.type_label_map.get(type_pred_idx, str(type_pred_idx)),
-        "confidence": float(type_probs[type_pred_idx].item()),
-        "class_probabilities": type_class_probs,
-      }
 
-    return {
-        "predicted_label": LABEL_MAP.get(pred_idx, str(pred_idx)),
-        "confidence": float(probs[pred_idx].item()),
-        "class_probabilities": class_probs,
-      "protein_type_prediction": protein_type_prediction,
-        "blosum_matrix": build_blosum_matrix(sequence),
+@app.get("/metrics")
+def prometheus_metrics():
+    registry = get_metrics()
+    if registry is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/admin/reload")
+def admin_reload():
+    if not get_settings().admin_enabled:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    bundle = reload_model_bundle()
+    return {"fingerprint": bundle.fingerprint}
+
+
+@app.get("/executor/stats")
+def executor_stats():
+    return get_executor().stats()
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    cache = get_result_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@app.post("/embed")
+def embed(payload: EmbedRequest):
+    records = [
+        (str(index), item) if isinstance(item, str) else (item.id or str(index), item.sequence)
+        for index, item in enumerate(payload.sequences)
+    ]
+    sequences = [sequence.strip().upper() for _, sequence in records]
+    if not sequences:
+        raise HTTPException(status_code=400, detail="At least one sequence is required")
+    for index, sequence in enumerate(sequences):
+        if not sequence:
+            raise HTTPException(status_code=400, detail=f"Sequence is required at index {index}")
+
+    bundle = get_request_bundle()
+    for index, sequence in enumerate(sequences):
+        if not bundle.tokenizer.clean_sequence(sequence):
+            raise HTTPException(
+                status_code=400, detail=f"Sequence has no amino-acid residues at index {index}"
+            )
+    if not bundle.can_embed:
+        raise HTTPException(status_code=501, detail="Embeddings need the eager inference backend")
+    vectors, stored = embed_with_store(bundle, sequences, infer_embeddings)
+    response = {
+        "fingerprint": bundle.embedding_fingerprint,
+        "dim": bundle.embedding_dim,
+        "dtype": str(vectors.dtype),
+        "embeddings": [
+            {"id": record_id, "embedding": vector.tolist(), "stored": was_stored}
+            for (record_id, _), vector, was_stored in zip(records, vectors, stored)
+        ],
     }
+    with stage_timer(get_metrics(), "serialize"):
+        return JSONResponse(content=response)
+
+
+@app.get("/embed/stats")
+def embed_stats():
+    store = get_embedding_store(get_request_bundle())
+    if store is None:
+        return {"enabled": False}
+    return {"enabled": True, **store.stats()}
+
+
+@app.post("/blosum")
+def blosum(payload: BlosumRequest):
+    sequence = payload.sequence.strip().upper()
+    if not sequence:
+        raise HTTPException(status_code=400, detail="Sequence is required")
+
+    if payload.mode == "summary":
+        return build_blosum_summary(sequence)
+    if payload.mode == "binary":
+        clean_seq = clean_residues(sequence)
+        return Response(
+            content=blosum_score_array(clean_seq).tobytes(),
+            media_type="application/octet-stream",
+            headers={"X-Matrix-Length": str(len(clean_seq))},
+        )
+    return build_blosum_tile(sequence, payload.row_offset, payload.col_offset, payload.tile_size)
+
+
+@app.post("/predict/batch")
+async def predict_batch(request: Request):
+    content_type = request.headers.get("content-type", "")
+    background = None
+
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if not isinstance(upload, UploadFile):
+            await form.close()
+            raise HTTPException(
+                status_code=400, detail="Multipart upload requires a FASTA 'file' field"
+            )
+        records: Iterable[Tuple[str, str]] = _fasta_upload_records(upload)
+        background = BackgroundTask(form.close)
+    else:
+        try:
+            body = await _read_capped_body(request, get_settings().batch_json_max_bytes)
+            payload = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Request body must be valid JSON")
+        records = _json_records(payload)
+
+    return StreamingResponse(
+        _stream_batch_predictions(records, get_settings().batch_chunk_size),
+        media_type="application/x-ndjson",
+        background=background,
+    )
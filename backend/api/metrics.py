@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+LENGTH_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, values)} {_format_value(value)}"
+            for values, value in items
+        ]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        buckets: Sequence[float],
+        label_names: Sequence[str] = (),
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        self.observe_many([value], *label_values)
+
+    def observe_many(self, values: Iterable[float], *label_values: str) -> None:
+        with self._lock:
+            # Per-bucket counts, then sum and count in the last two slots.
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0.0] * (len(self.buckets) + 3)
+            for value in values:
+                series[bisect_left(self.buckets, value)] += 1
+                series[-2] += value
+                series[-1] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(values, list(series)) for values, series in self._series.items()]
+        lines = []
+        for values, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                labels = _format_labels(self.label_names, values, f'le="{_format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{labels} {int(cumulative)}")
+            labels = _format_labels(self.label_names, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {int(series[-1])}")
+        return lines
+
+
+class CallbackMetric:
+    def __init__(self, name: str, help_text: str, read: Callable[[], float], kind: str = "gauge"):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+        self.kind = kind
+
+    def samples(self) -> List[str]:
+        return [f"{self.name} {_format_value(float(self.read()))}"]
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = "protein_api_"):
+        self.prefix = prefix
+        self._metrics: List = []
+
+        self.requests = self.counter("requests_total", "HTTP requests by route and status", ("route", "status"))
+        self.request_latency = self.histogram(
+            "request_duration_seconds", "HTTP request latency", LATENCY_BUCKETS, ("route",)
+        )
+        self.stage_latency = self.histogram(
+            "stage_duration_seconds", "Latency of individual prediction stages", LATENCY_BUCKETS, ("stage",)
+        )
+        self.batch_size = self.histogram("batch_size", "Sequences per forward pass", BATCH_SIZE_BUCKETS)
+        self.sequence_length = self.histogram("sequence_length", "Cleaned input sequence length", LENGTH_BUCKETS)
+        self.padded_length = self.histogram("padded_length", "Padded width of each forward batch", LENGTH_BUCKETS)
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        metric = Counter(self.prefix + name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        buckets: Sequence[float],
+        label_names: Sequence[str] = (),
+    ) -> Histogram:
+        metric = Histogram(self.prefix + name, help_text, buckets, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def callback(
+        self,
+        name: str,
+        help_text: str,
+        read: Callable[[], float],
+        kind: str = "gauge",
+    ) -> CallbackMetric:
+        metric = CallbackMetric(self.prefix + name, help_text, read, kind)
+        self._metrics.append(metric)
+        return metric
+
+    def observe_stages(self, timings: Dict[str, float]) -> None:
+        for stage, seconds in timings.items():
+            self.stage_latency.observe(seconds, stage)
+
+    @contextmanager
+    def time_stage(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_latency.observe(time.perf_counter() - start, stage)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+def stage_timer(registry: Optional[MetricsRegistry], stage: str) -> ContextManager[None]:
+    return registry.time_stage(stage) if registry is not None else nullcontext()
+
+
+class MetricsMiddleware:
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            route = route or getattr(scope.get("endpoint"), "__name__", "unmatched")
+            self.registry.requests.inc(route, str(status["code"]))
+            self.registry.request_latency.observe(time.perf_counter() - start, route)
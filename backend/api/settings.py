@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Tuple
+
+
+ENV_PREFIX = "PROTEIN_API_"
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.environ.get(ENV_PREFIX + name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(ENV_PREFIX + name)
+    return default if raw is None else int(raw)
+
+
+def _env_str(name: str, default: str) -> str:
+    return os.environ.get(ENV_PREFIX + name, default)
+
+
+def _env_int_tuple(name: str, default: Tuple[int, ...]) -> Tuple[int, ...]:
+    raw = os.environ.get(ENV_PREFIX + name)
+    if raw is None:
+        return default
+    return tuple(int(part) for part in raw.split(",") if part.strip())
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(ENV_PREFIX + name)
+    return default if raw is None else float(raw)
+
+
+@dataclass(frozen=True)
+class ApiSettings:
+    batching_enabled: bool = True
+    max_batch_size: int = 16
+    max_wait_ms: float = 5.0
+    batch_chunk_size: int = 64
+    batch_json_max_bytes: int = 8 * 1024 * 1024
+    length_bucket: int = 8
+    cache_enabled: bool = True
+    cache_backend: str = "local"
+    cache_max_entries: int = 10000
+    cache_max_bytes: int = 64 * 1024 * 1024
+    cache_ttl_seconds: float = 3600.0
+    cache_redis_url: str = "redis://localhost:6379/0"
+    quantize: bool = False
+    precision: str = "fp32"
+    attention: str = "native"
+    windowed_inference: bool = False
+    window_size: int = 0
+    window_stride: int = 0
+    window_aggregation: str = "mean_logits"
+    window_batch_size: int = 256
+    embedding_store_dir: str = ""
+    embedding_dtype: str = "float32"
+    inference_backend: str = "eager"
+    eager_load: bool = True
+    metrics_enabled: bool = True
+    admin_enabled: bool = False
+    executor: str = "thread"
+    executor_workers: int = 1
+    torch_threads: int = 0
+    max_queue_size: int = 64
+    warmup_lengths: Tuple[int, ...] = (32, 64, 128, 256, 512)
+
+    @classmethod
+    def from_env(cls) -> "ApiSettings":
+        return cls(
+            batching_enabled=_env_bool("BATCHING_ENABLED", cls.batching_enabled),
+            max_batch_size=_env_int("MAX_BATCH_SIZE", cls.max_batch_size),
+            max_wait_ms=_env_float("MAX_WAIT_MS", cls.max_wait_ms),
+            batch_chunk_size=_env_int("BATCH_CHUNK_SIZE", cls.batch_chunk_size),
+            batch_json_max_bytes=_env_int("BATCH_JSON_MAX_BYTES", cls.batch_json_max_bytes),
+            length_bucket=_env_int("LENGTH_BUCKET", cls.length_bucket),
+            cache_enabled=_env_bool("CACHE_ENABLED", cls.cache_enabled),
+            cache_backend=_env_str("CACHE_BACKEND", cls.cache_backend),
+            cache_max_entries=_env_int("CACHE_MAX_ENTRIES", cls.cache_max_entries),
+            cache_max_bytes=_env_int("CACHE_MAX_BYTES", cls.cache_max_bytes),
+            cache_ttl_seconds=_env_float("CACHE_TTL_SECONDS", cls.cache_ttl_seconds),
+            cache_redis_url=_env_str("CACHE_REDIS_URL", cls.cache_redis_url),
+            quantize=_env_bool("QUANTIZE", cls.quantize),
+            precision=_env_str("PRECISION", cls.precision),
+            attention=_env_str("ATTENTION", cls.attention),
+            windowed_inference=_env_bool("WINDOWED_INFERENCE", cls.windowed_inference),
+            window_size=_env_int("WINDOW_SIZE", cls.window_size),
+            window_stride=_env_int("WINDOW_STRIDE", cls.window_stride),
+            window_aggregation=_env_str("WINDOW_AGGREGATION", cls.window_aggregation),
+            window_batch_size=_env_int("WINDOW_BATCH_SIZE", cls.window_batch_size),
+            embedding_store_dir=_env_str("EMBEDDING_STORE_DIR", cls.embedding_store_dir),
+            embedding_dtype=_env_str("EMBEDDING_DTYPE", cls.embedding_dtype),
+            inference_backend=_env_str("INFERENCE_BACKEND", cls.inference_backend),
+            eager_load=_env_bool("EAGER_LOAD", cls.eager_load),
+            metrics_enabled=_env_bool("METRICS_ENABLED", cls.metrics_enabled),
+            admin_enabled=_env_bool("ADMIN_ENABLED", cls.admin_enabled),
+            executor=_env_str("EXECUTOR", cls.executor),
+            executor_workers=_env_int("EXECUTOR_WORKERS", cls.executor_workers),
+            torch_threads=_env_int("TORCH_THREADS", cls.torch_threads),
+            max_queue_size=_env_int("MAX_QUEUE_SIZE", cls.max_queue_size),
+            warmup_lengths=_env_int_tuple("WARMUP_LENGTHS", cls.warmup_lengths),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> ApiSettings:
+    return ApiSettings.from_env()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from benchmarks.timing import random_sequences, summarize
+
+
+def run_load_test(
+    requests: int,
+    concurrency: int,
+    lengths: Sequence[int],
+    blosum_mode: str = "none",
+    seed: int = 0,
+) -> Dict[str, Any]:
+    # Imported lazily so PROTEIN_API_* settings can be set before the app is built.
+    from fastapi.testclient import TestClient
+
+    from api.main import app
+
+    rng = np.random.default_rng(seed)
+    sampled_lengths = rng.choice(np.asarray(lengths), size=requests)
+    # Unique sequences, so the result cache never answers for the model.
+    sequences = [
+        random_sequences(1, int(length), seed=seed + idx + 1)[0]
+        for idx, length in enumerate(sampled_lengths)
+    ]
+
+    with TestClient(app) as client:
+        while client.get("/ready").status_code != 200:
+            time.sleep(0.05)
+
+        def send(sequence: str):
+            start = time.perf_counter()
+            response = client.post("/predict", json={"sequence": sequence, "blosum_mode": blosum_mode})
+            return response.status_code, time.perf_counter() - start
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(send, sequences))
+        elapsed = time.perf_counter() - started
+
+    latencies: List[float] = [seconds for status, seconds in outcomes if status == 200]
+    statuses = Counter(str(status) for status, _ in outcomes)
+    report: Dict[str, Any] = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "blosum_mode": blosum_mode,
+        "statuses": dict(statuses),
+        "req_per_s": len(latencies) / elapsed if elapsed > 0 else 0.0,
+    }
+    if latencies:
+        report.update(summarize(latencies))
+    return report
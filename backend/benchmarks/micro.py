@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import torch
+
+from api.blosum import build_blosum_matrix, build_blosum_summary
+from benchmarks.timing import random_sequences, time_call
+from ml.basic_protein_model import build_classifier
+from ml.protein_tokenizer import ProteinTokenizer
+from training.train_basic_model import build_tokenizer, load_config
+
+
+DEFAULT_CONFIG = Path(__file__).resolve().parents[1] / "training" / "configs" / "public_small_train.yaml"
+
+
+def bench_tokenizer(
+    tokenizer: ProteinTokenizer,
+    batch_sizes: Sequence[int],
+    lengths: Sequence[int],
+    repeats: int,
+) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for batch_size in batch_sizes:
+        for length in lengths:
+            sequences = random_sequences(batch_size, length)
+            stats = time_call(lambda: tokenizer.batch_encode(sequences, dynamic_padding=True), repeats)
+            stats["sequences_per_s"] = batch_size / (stats["p50_ms"] / 1000.0)
+            results[f"b{batch_size}_l{length}"] = stats
+    return results
+
+
+def bench_forward(
+    model: Callable[[torch.Tensor], Any],
+    tokenizer: ProteinTokenizer,
+    batch_sizes: Sequence[int],
+    lengths: Sequence[int],
+    repeats: int,
+) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    with torch.no_grad():
+        for batch_size in batch_sizes:
+            for length in lengths:
+                if length > tokenizer.max_length:
+                    continue
+                input_ids = tokenizer.batch_encode(random_sequences(batch_size, length), dynamic_padding=True)
+                stats = time_call(lambda: model(input_ids), repeats)
+                stats["sequences_per_s"] = batch_size / (stats["p50_ms"] / 1000.0)
+                results[f"b{batch_size}_l{length}"] = stats
+    return results
+
+
+def bench_blosum(lengths: Sequence[int], repeats: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for length in lengths:
+        sequence = random_sequences(1, length)[0]
+        results[f"full_l{length}"] = time_call(lambda: build_blosum_matrix(sequence), repeats, warmup=1)
+        results[f"summary_l{length}"] = time_call(lambda: build_blosum_summary(sequence), repeats, warmup=1)
+    return results
+
+
+def build_benchmark_model(
+    config_path: Path,
+    checkpoint_path: Optional[Path] = None,
+    attention: Optional[str] = None,
+) -> Tuple[torch.nn.Module, ProteinTokenizer]:
+    config = load_config(config_path)
+    tokenizer = build_tokenizer(config)
+    model_cfg = {**config["model"], "attention": attention} if attention else config["model"]
+    model = build_classifier(
+        model_cfg,
+        vocab_size=len(tokenizer.vocab.token_to_idx),
+        pad_id=tokenizer.vocab.pad_id,
+    )
+    if checkpoint_path is not None:
+        checkpoint = torch.load(str(checkpoint_path), map_location="cpu")
+        model.load_state_dict(checkpoint["model_state_dict"])
+    model.eval()
+    return model, tokenizer
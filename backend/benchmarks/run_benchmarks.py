@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import torch
+
+from benchmarks.micro import (
+    DEFAULT_CONFIG,
+    bench_blosum,
+    bench_forward,
+    bench_tokenizer,
+    build_benchmark_model,
+)
+from ml.basic_protein_model import ATTENTION_IMPLEMENTATIONS
+from ml.precision import FP32, PRECISIONS, native_bf16_supported, precision_forward
+
+
+SUITES = ("tokenizer", "forward", "blosum", "http")
+HIGHER_IS_BETTER = ("_per_s",)
+# Tail percentiles from short runs are too noisy to gate on by default.
+DEFAULT_COMPARE_METRICS = ("p50_ms", "_per_s")
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat: Dict[str, float] = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and (name.endswith("_ms") or name.endswith("_per_s")):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float,
+    metrics: Tuple[str, ...] = DEFAULT_COMPARE_METRICS,
+) -> List[Tuple[str, float, float, float]]:
+    """Return (metric, baseline, current, relative change) for metrics worse than ``tolerance``."""
+    now = flatten(current["results"])
+    before = flatten(baseline["results"])
+    regressions = []
+    for name in sorted(now.keys() & before.keys()):
+        if not name.endswith(metrics) or before[name] <= 0:
+            continue
+        change = (now[name] - before[name]) / before[name]
+        worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+        if worse > tolerance:
+            regressions.append((name, before[name], now[name], change))
+    return regressions
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "cpu_count": os.cpu_count(),
+        "machine": platform.machine(),
+        "native_bf16": native_bf16_supported(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark tokenization, model forward, BLOSUM and /predict"
+    )
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--config", type=str, default=str(DEFAULT_CONFIG))
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=None,
+        help="Load weights (shape-only random init otherwise)",
+    )
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument("--blosum-lengths", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument(
+        "--attention",
+        choices=ATTENTION_IMPLEMENTATIONS,
+        default=None,
+        help="Override model.attention",
+    )
+    parser.add_argument(
+        "--precision",
+        choices=PRECISIONS,
+        default=FP32,
+        help="Autocast precision for the forward suite",
+    )
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--blosum-mode", choices=["full", "summary", "none"], default="none")
+    parser.add_argument("--output", type=str, default="benchmark_results.json")
+    parser.add_argument(
+        "--baseline", type=str, default=None, help="Previous results JSON to compare against"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.15, help="Allowed relative slowdown per metric"
+    )
+    parser.add_argument(
+        "--compare-metrics",
+        nargs="+",
+        default=list(DEFAULT_COMPARE_METRICS),
+        help="Metric name suffixes checked against the baseline",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results: Dict[str, Any] = {}
+
+    if "tokenizer" in args.suites or "forward" in args.suites:
+        checkpoint = Path(args.checkpoint) if args.checkpoint else None
+        model, tokenizer = build_benchmark_model(Path(args.config), checkpoint, args.attention)
+        if "tokenizer" in args.suites:
+            results["tokenizer"] = bench_tokenizer(
+                tokenizer, args.batch_sizes, args.lengths, args.repeats
+            )
+        if "forward" in args.suites:
+            forward = precision_forward(model, args.precision)
+            results["forward"] = bench_forward(
+                forward, tokenizer, args.batch_sizes, args.lengths, args.repeats
+            )
+    if "blosum" in args.suites:
+        results["blosum"] = bench_blosum(args.blosum_lengths, args.repeats)
+    if "http" in args.suites:
+        from benchmarks.load_test import run_load_test
+
+        results["http"] = run_load_test(
+            args.requests, args.concurrency, args.lengths, args.blosum_mode
+        )
+
+    report = {"environment": environment(), "args": vars(args), "results": results}
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    for name, value in flatten(results).items():
+        if name.endswith(("p50_ms", "p95_ms", "p99_ms", "_per_s")):
+            print(f"{name}: {value:.3f}")
+    print(f"Saved benchmark results: {output_path}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        for key in ("torch", "torch_threads", "cpu_count"):
+            if baseline["environment"].get(key) != report["environment"][key]:
+                print(
+                    f"Warning: baseline {key}={baseline['environment'].get(key)} "
+                    f"differs from {report['environment'][key]}"
+                )
+        regressions = compare(report, baseline, args.tolerance, tuple(args.compare_metrics))
+        for name, before, now, change in regressions:
+            print(f"REGRESSION {name}: {before:.3f} -> {now:.3f} ({change:+.1%})")
+        if regressions:
+            raise SystemExit(
+                f"{len(regressions)} metrics regressed by more than {args.tolerance:.0%}"
+            )
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+
+def summarize(samples_s: Sequence[float]) -> Dict[str, float]:
+    samples_ms = np.asarray(samples_s, dtype=np.float64) * 1000.0
+    return {
+        "mean_ms": float(samples_ms.mean()),
+        "p50_ms": float(np.percentile(samples_ms, 50)),
+        "p95_ms": float(np.percentile(samples_ms, 95)),
+        "p99_ms": float(np.percentile(samples_ms, 99)),
+    }
+
+
+def time_call(fn: Callable[[], object], repeats: int, warmup: int = 2) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    samples: List[float] = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def random_sequences(count: int, length: int, seed: int = 0) -> List[str]:
+    alphabet = np.frombuffer(b"ACDEFGHIKLMNPQRSTVWY", dtype=np.uint8)
+    rng = np.random.default_rng(seed)
+    codes = alphabet[rng.integers(0, alphabet.size, size=(count, length))]
+    return [row.tobytes().decode("ascii") for row in codes]
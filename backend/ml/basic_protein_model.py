@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+from typing import Any, Dict
+
 import torch
 import torch.nn as nn
+from torch.utils.checkpoint import checkpoint
+
+from ml.packed_encoder import PackedTransformerEncoder, pack_input_ids, packed_mean_pool
+
+
+ATTENTION_IMPLEMENTATIONS = ("native", "sdpa")
 
 
-class BasicProteinClassifier(nn.Module):
+class ProteinEncoder(nn.Module):
     def __init__(
         self,
         vocab_size: int,
@@ -14,27 +22,41 @@ class BasicProteinClassifier(nn.Module):
         num_layers: int,
         ff_dim: int,
         dropout: float,
-        num_classes: int,
         pad_id: int,
+        attention: str = "native",
     ):
         super().__init__()
+        if attention not in ATTENTION_IMPLEMENTATIONS:
+            raise ValueError(f"Unknown attention implementation: {attention}")
         self.pad_id = pad_id
+        # Recompute each encoder layer in backward instead of keeping its activations.
+        self.activation_checkpointing = False
         self.token_embedding = nn.Embedding(vocab_size, embedding_dim, padding_idx=pad_id)
         self.position_embedding = nn.Embedding(max_length, embedding_dim)
 
-        encoder_layer = nn.TransformerEncoderLayer(
-            d_model=embedding_dim,
-            nhead=num_heads,
-            dim_feedforward=ff_dim,
-            dropout=dropout,
-            batch_first=True,
-            activation="gelu",
-        )
-        self.encoder = nn.TransformerEncoder(encoder_layer, num_layers=num_layers)
+        if attention == "sdpa":
+            self.encoder = PackedTransformerEncoder(
+                d_model=embedding_dim,
+                nhead=num_heads,
+                dim_feedforward=ff_dim,
+                dropout=dropout,
+                num_layers=num_layers,
+            )
+        else:
+            encoder_layer = nn.TransformerEncoderLayer(
+                d_model=embedding_dim,
+                nhead=num_heads,
+                dim_feedforward=ff_dim,
+                dropout=dropout,
+                batch_first=True,
+                activation="gelu",
+            )
+            self.encoder = nn.TransformerEncoder(encoder_layer, num_layers=num_layers)
         self.dropout = nn.Dropout(dropout)
-        self.classifier = nn.Linear(embedding_dim, num_classes)
 
-    def forward(self, input_ids: torch.Tensor) -> torch.Tensor:
+    def encode(self, input_ids: torch.Tensor) -> torch.Tensor:
+        if isinstance(self.encoder, PackedTransformerEncoder):
+            return self._encode_packed(input_ids)
         batch_size, seq_len = input_ids.shape
         positions = torch.arange(seq_len, device=input_ids.device).unsqueeze(0).expand(batch_size, -1)
 
@@ -43,12 +65,124 @@ class BasicProteinClassifier(nn.Module):
         hidden_states = token_embeddings + positional_embeddings
 
         padding_mask = input_ids.eq(self.pad_id)
-        encoded = self.encoder(hidden_states, src_key_padding_mask=padding_mask)
+        if self.activation_checkpointing and self.training:
+            encoded = hidden_states
+            for layer in self.encoder.layers:
+                encoded = checkpoint(layer, encoded, None, padding_mask, use_reentrant=False)
+        else:
+            encoded = self.encoder(hidden_states, src_key_padding_mask=padding_mask)
 
         non_pad_mask = (~padding_mask).unsqueeze(-1)
         sum_embeddings = (encoded * non_pad_mask).sum(dim=1)
         lengths = non_pad_mask.sum(dim=1).clamp(min=1)
-        pooled = sum_embeddings / lengths
+        return sum_embeddings / lengths
+
+    def _encode_packed(self, input_ids: torch.Tensor) -> torch.Tensor:
+        # Real tokens only, flattened to (total_tokens, dim); pooling is one index_add over them.
+        packed = pack_input_ids(input_ids, self.pad_id)
+        hidden_states = self.token_embedding(input_ids[packed.owners, packed.positions])
+        hidden_states = hidden_states + self.position_embedding(packed.positions)
+        checkpoint_layers = self.activation_checkpointing and self.training
+        return packed_mean_pool(self.encoder(hidden_states, packed, checkpoint_layers), packed)
+
+
+class BasicProteinClassifier(ProteinEncoder):
+    def __init__(
+        self,
+        vocab_size: int,
+        max_length: int,
+        embedding_dim: int,
+        num_heads: int,
+        num_layers: int,
+        ff_dim: int,
+        dropout: float,
+        num_classes: int,
+        pad_id: int,
+        attention: str = "native",
+    ):
+        super().__init__(
+            vocab_size=vocab_size,
+            max_length=max_length,
+            embedding_dim=embedding_dim,
+            num_heads=num_heads,
+            num_layers=num_layers,
+            ff_dim=ff_dim,
+            dropout=dropout,
+            pad_id=pad_id,
+            attention=attention,
+        )
+        self.classifier = nn.Linear(embedding_dim, num_classes)
+
+    def classify(self, pooled: torch.Tensor) -> torch.Tensor:
+        return self.classifier(self.dropout(pooled))
+
+    def forward(self, input_ids: torch.Tensor) -> torch.Tensor:
+        return self.classify(self.encode(input_ids))
+
+
+class MultiHeadProteinClassifier(ProteinEncoder):
+    def __init__(
+        self,
+        vocab_size: int,
+        max_length: int,
+        embedding_dim: int,
+        num_heads: int,
+        num_layers: int,
+        ff_dim: int,
+        dropout: float,
+        heads: Dict[str, int],
+        pad_id: int,
+        attention: str = "native",
+    ):
+        super().__init__(
+            vocab_size=vocab_size,
+            max_length=max_length,
+            embedding_dim=embedding_dim,
+            num_heads=num_heads,
+            num_layers=num_layers,
+            ff_dim=ff_dim,
+            dropout=dropout,
+            pad_id=pad_id,
+            attention=attention,
+        )
+        self.heads = nn.ModuleDict(
+            {name: nn.Linear(embedding_dim, num_classes) for name, num_classes in heads.items()}
+        )
+
+    def classify(self, pooled: torch.Tensor) -> Dict[str, torch.Tensor]:
+        pooled = self.dropout(pooled)
+        return {name: head(pooled) for name, head in self.heads.items()}
+
+    def forward(self, input_ids: torch.Tensor) -> Dict[str, torch.Tensor]:
+        return self.classify(self.encode(input_ids))
+
+
+def build_classifier(model_cfg: Dict[str, Any], vocab_size: int, pad_id: int) -> ProteinEncoder:
+    common = dict(
+        vocab_size=vocab_size,
+        max_length=model_cfg["max_length"],
+        embedding_dim=model_cfg["embedding_dim"],
+        num_heads=model_cfg["num_heads"],
+        num_layers=model_cfg["num_layers"],
+        ff_dim=model_cfg["ff_dim"],
+        dropout=model_cfg["dropout"],
+        pad_id=pad_id,
+        attention=model_cfg.get("attention", "native"),
+    )
+    if "heads" in model_cfg:
+        return MultiHeadProteinClassifier(heads=dict(model_cfg["heads"]), **common)
+    return BasicProteinClassifier(num_classes=model_cfg["num_classes"], **common)
+
 
-        logits = self.classifier(self.dropout(pooled))
-        return logits
+def resize_position_embeddings(state_dict: Dict[str, torch.Tensor], max_length: int) -> Dict[str, torch.Tensor]:
+    weight = state_dict["position_embedding.weight"]
+    old_length = weight.size(0)
+    if max_length == old_length:
+        return state_dict
+    if max_length < old_length:
+        resized = weight[:max_length].clone()
+    else:
+        # Tile the learned table so new positions start from trained embeddings rather than noise.
+        repeats = -(-max_length // old_length)
+        resized = weight.repeat(repeats, 1)[:max_length].clone()
+    return {**state_dict, "position_embedding.weight": resized}
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: stores there assume a single writer.
+    fcntl = None
+
+
+STORE_FORMAT_VERSION = 1
+EMBEDDING_DTYPES = ("float32", "float16")
+
+
+def sequence_digest(clean_sequence: str) -> str:
+    return hashlib.sha256(clean_sequence.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Append-only, memory-mapped pooled embeddings for one model fingerprint."""
+
+    def __init__(self, root: Path, fingerprint: str, dim: int, dtype: str = "float32"):
+        if dtype not in EMBEDDING_DTYPES:
+            raise ValueError(
+                f"Unknown embedding dtype: {dtype} (expected one of {', '.join(EMBEDDING_DTYPES)})"
+            )
+        # Each checkpoint gets its own directory, so a reloaded model never reads stale vectors.
+        self.path = Path(root) / fingerprint
+        self.fingerprint = fingerprint
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.row_bytes = dim * self.dtype.itemsize
+        self.vectors_path = self.path / "vectors.bin"
+        self.index_path = self.path / "index.tsv"
+
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._count = 0
+        self._index_offset = 0
+        self._vectors: Optional[np.memmap] = None
+        self._init_files()
+        self._load_index()
+
+    @classmethod
+    def open(cls, root: Path, fingerprint: str) -> "EmbeddingStore":
+        meta = json.loads((Path(root) / fingerprint / "meta.json").read_text(encoding="utf-8"))
+        return cls(root, fingerprint, dim=meta["dim"], dtype=meta["dtype"])
+
+    def _init_files(self) -> None:
+        meta = {
+            "version": STORE_FORMAT_VERSION,
+            "fingerprint": self.fingerprint,
+            "dim": self.dim,
+            "dtype": self.dtype.name,
+        }
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            self.path.mkdir(parents=True, exist_ok=True)
+            scratch = meta_path.with_name(f"meta.json.tmp-{os.getpid()}")
+            scratch.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+            os.replace(scratch, meta_path)
+            self.vectors_path.touch()
+            self.index_path.touch()
+        existing = json.loads(meta_path.read_text(encoding="utf-8"))
+        if (existing["dim"], existing["dtype"]) != (self.dim, self.dtype.name):
+            raise ValueError(
+                f"{self.path} stores {existing['dim']}-d {existing['dtype']} embeddings, "
+                f"not {self.dim}-d {self.dtype.name}"
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load_index()
+            return self._count
+
+    def _load_index(self) -> None:
+        # Pick up rows appended by other processes since the last read; partial lines wait.
+        if self.index_path.stat().st_size == self._index_offset:
+            return
+        with self.index_path.open("rb") as file:
+            file.seek(self._index_offset)
+            data = file.read()
+        complete = data[: data.rfind(b"\n") + 1]
+        for line in complete.decode("utf-8").splitlines():
+            row_text, digest, accession = line.split("\t")
+            row = int(row_text)
+            self._rows[digest] = row
+            if accession:
+                self._rows[accession] = row
+            self._count = max(self._count, row + 1)
+        self._index_offset += len(complete)
+
+    def _mapped(self) -> np.memmap:
+        if self._vectors is None or self._vectors.shape[0] < self._count:
+            self._vectors = np.memmap(
+                self.vectors_path, dtype=self.dtype, mode="r", shape=(self._count, self.dim)
+            )
+        return self._vectors
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Look up vectors by sequence digest or UniProt accession."""
+        with self._lock:
+            self._load_index()
+            rows = [self._rows.get(key) for key in keys]
+            found = [row for row in rows if row is not None]
+            if not found:
+                return [None] * len(keys)
+            vectors = iter(np.array(self._mapped()[found]))
+        return [next(vectors) if row is not None else None for row in rows]
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        return self.get_many([key])[0]
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._load_index()
+            return key in self._rows
+
+    def vectors(self) -> np.ndarray:
+        """All stored rows as a read-only (rows, dim) memory map."""
+        with self._lock:
+            self._load_index()
+            if not self._count:
+                return np.zeros((0, self.dim), dtype=self.dtype)
+            return self._mapped()
+
+    @contextmanager
+    def _writer(self) -> Iterator[None]:
+        with self._lock, self.index_path.open("ab") as index_file:
+            if fcntl is not None:
+                fcntl.flock(index_file.fileno(), fcntl.LOCK_EX)
+            try:
+                self._load_index()
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(index_file.fileno(), fcntl.LOCK_UN)
+
+    def append(
+        self,
+        digests: Sequence[str],
+        vectors: np.ndarray,
+        accessions: Optional[Sequence[Optional[str]]] = None,
+    ) -> List[int]:
+        """Store vectors not already present and return the row of every digest."""
+        vectors = np.asarray(vectors, dtype=self.dtype).reshape(len(digests), self.dim)
+        accessions = accessions if accessions is not None else [None] * len(digests)
+        with self._writer():
+            rows: List[int] = []
+            pending: Dict[str, int] = {}
+            new_rows: List[int] = []
+            lines: List[str] = []
+            for position, (digest, accession) in enumerate(zip(digests, accessions)):
+                row = self._rows.get(digest, pending.get(digest))
+                is_new = row is None
+                if is_new:
+                    row = self._count + len(new_rows)
+                    pending[digest] = row
+                    new_rows.append(position)
+                known = self._rows.get(accession, pending.get(accession)) if accession else row
+                if is_new or known != row:
+                    # An existing vector seen under a new accession only gains an index line.
+                    lines.append(f"{row}\t{digest}\t{accession or ''}\n")
+                    if accession:
+                        pending[accession] = row
+                rows.append(row)
+
+            if new_rows:
+                with self.vectors_path.open("r+b") as file:
+                    # Drop bytes left by a writer that died before indexing them.
+                    file.truncate(self._count * self.row_bytes)
+                    file.seek(0, os.SEEK_END)
+                    file.write(vectors[new_rows].tobytes())
+                    file.flush()
+                    os.fsync(file.fileno())
+            if lines:
+                # The index line is the commit point: rows become visible once it is written.
+                with self.index_path.open("ab") as file:
+                    file.write("".join(lines).encode("utf-8"))
+                    file.flush()
+                    os.fsync(file.fileno())
+                self._load_index()
+        return rows
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            self._load_index()
+            return {
+                "path": str(self.path),
+                "rows": self._count,
+                "dim": self.dim,
+                "dtype": self.dtype.name,
+                "bytes": self._count * self.row_bytes,
+            }
+
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import copy
+import inspect
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import torch
+import torch.nn as nn
+
+from ml.inference_backends import EagerBackend, export_metadata_path
+from ml.precision import disable_encoder_fast_path
+
+
+class ExportableClassifier(nn.Module):
+    def __init__(self, model: nn.Module, output_names: Sequence[str]):
+        super().__init__()
+        self.model = model
+        self.output_names = list(output_names)
+
+    def forward(self, input_ids: torch.Tensor) -> Tuple[torch.Tensor, ...]:
+        outputs = self.model(input_ids)
+        if isinstance(outputs, dict):
+            return tuple(outputs[name] for name in self.output_names)
+        return (outputs,)
+
+
+def wrap_for_export(model: nn.Module) -> ExportableClassifier:
+    # The fused TransformerEncoder fast path branches on the padding mask and switches to nested
+    # tensors, so a trace would freeze whichever branch the example took. Export a copy that runs
+    # the regular path; the caller's model keeps the fast path as the parity reference.
+    exported = disable_encoder_fast_path(copy.deepcopy(model))
+    return ExportableClassifier(exported, EagerBackend(model).output_names).eval()
+
+
+def example_input_ids(max_length: int, pad_id: int, vocab_size: int) -> torch.Tensor:
+    generator = torch.Generator().manual_seed(0)
+    length = min(16, max_length)
+    input_ids = torch.randint(pad_id + 2, vocab_size, (2, length), generator=generator)
+    input_ids[1, length // 2 :] = pad_id
+    return input_ids
+
+
+def export_torchscript(wrapper: ExportableClassifier, example: torch.Tensor, path: Path) -> None:
+    with torch.no_grad():
+        traced = torch.jit.trace(wrapper, (example,))
+    traced.save(str(path))
+
+
+def export_onnx(wrapper: ExportableClassifier, example: torch.Tensor, path: Path, max_length: int) -> None:
+    kwargs: Dict[str, Any] = {
+        "input_names": ["input_ids"],
+        "output_names": wrapper.output_names,
+    }
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        kwargs["dynamo"] = True
+        kwargs["dynamic_shapes"] = {
+            "input_ids": {0: torch.export.Dim("batch"), 1: torch.export.Dim("seq", max=max_length)}
+        }
+    else:
+        kwargs["dynamic_axes"] = {
+            "input_ids": {0: "batch", 1: "seq"},
+            **{name: {0: "batch"} for name in wrapper.output_names},
+        }
+    with torch.no_grad():
+        torch.onnx.export(wrapper, (example,), str(path), **kwargs)
+
+
+def write_export_metadata(
+    checkpoint_path: Path,
+    model_cfg: Dict[str, Any],
+    output_names: List[str],
+    formats: List[str],
+) -> Path:
+    path = export_metadata_path(checkpoint_path)
+    metadata = {"model": model_cfg, "output_names": output_names, "formats": formats}
+    path.write_text(json.dumps(metadata, indent=2), encoding="utf-8")
+    return path
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import torch
+import torch.nn as nn
+
+from ml.precision import FP32, autocast_context, disable_encoder_fast_path, outputs_to_float
+
+
+LOGITS_OUTPUT = "logits"
+
+
+def export_metadata_path(checkpoint_path: Path) -> Path:
+    return checkpoint_path.with_suffix(".export.json")
+
+
+def torchscript_path(checkpoint_path: Path) -> Path:
+    return checkpoint_path.with_suffix(".ts")
+
+
+def onnx_path(checkpoint_path: Path) -> Path:
+    return checkpoint_path.with_suffix(".onnx")
+
+
+def load_export_metadata(checkpoint_path: Path) -> Dict[str, Any]:
+    return json.loads(export_metadata_path(checkpoint_path).read_text(encoding="utf-8"))
+
+
+class InferenceBackend(ABC):
+    output_names: List[str]
+
+    @abstractmethod
+    def __call__(self, input_ids: torch.Tensor) -> Dict[str, torch.Tensor]:
+        ...
+
+
+class EagerBackend(InferenceBackend):
+    def __init__(self, model: nn.Module, precision: str = FP32):
+        self.model = disable_encoder_fast_path(model) if precision != FP32 else model
+        self.precision = precision
+        heads = getattr(model, "heads", None)
+        self.output_names = list(heads) if heads is not None else [LOGITS_OUTPUT]
+
+    def __call__(self, input_ids: torch.Tensor) -> Dict[str, torch.Tensor]:
+        with autocast_context(self.precision, input_ids.device.type):
+            outputs = outputs_to_float(self.model(input_ids))
+        return outputs if isinstance(outputs, dict) else {LOGITS_OUTPUT: outputs}
+
+    def encode(self, input_ids: torch.Tensor) -> torch.Tensor:
+        with autocast_context(self.precision, input_ids.device.type):
+            return self.model.encode(input_ids).float()
+
+    def classify(self, pooled: torch.Tensor) -> Dict[str, torch.Tensor]:
+        with autocast_context(self.precision, pooled.device.type):
+            outputs = outputs_to_float(self.model.classify(pooled))
+        return outputs if isinstance(outputs, dict) else {LOGITS_OUTPUT: outputs}
+
+
+class TorchScriptBackend(InferenceBackend):
+    def __init__(self, path: Path, output_names: Sequence[str]):
+        self.module = torch.jit.load(str(path), map_location="cpu")
+        self.module.eval()
+        self.output_names = list(output_names)
+
+    def __call__(self, input_ids: torch.Tensor) -> Dict[str, torch.Tensor]:
+        outputs = self.module(input_ids)
+        return dict(zip(self.output_names, outputs))
+
+
+class OnnxBackend(InferenceBackend):
+    def __init__(self, path: Path, output_names: Sequence[str]):
+        try:
+            import onnxruntime
+        except ImportError as exc:
+            raise RuntimeError("The onnx inference backend requires the 'onnxruntime' package") from exc
+
+        self.session = onnxruntime.InferenceSession(str(path), providers=["CPUExecutionProvider"])
+        self.output_names = list(output_names)
+
+    def __call__(self, input_ids: torch.Tensor) -> Dict[str, torch.Tensor]:
+        outputs = self.session.run(self.output_names, {"input_ids": input_ids.numpy()})
+        return {name: torch.from_numpy(value) for name, value in zip(self.output_names, outputs)}
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from typing import NamedTuple
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.utils.checkpoint import checkpoint
+
+
+class PackedBatch(NamedTuple):
+    owners: torch.Tensor
+    positions: torch.Tensor
+    lengths: torch.Tensor
+    key_mask: torch.Tensor
+
+    @property
+    def batch_size(self) -> int:
+        return self.key_mask.size(0)
+
+    @property
+    def max_length(self) -> int:
+        return self.key_mask.size(-1)
+
+
+def pack_input_ids(input_ids: torch.Tensor, pad_id: int) -> PackedBatch:
+    non_pad = input_ids.ne(pad_id)
+    owners, positions = non_pad.nonzero(as_tuple=True)
+    lengths = non_pad.sum(dim=1)
+    # Attention only needs to span the longest real sequence, not the padded batch width.
+    width = int(positions.max()) + 1 if positions.numel() else 1
+    key_mask = non_pad[:, :width].view(input_ids.size(0), 1, 1, width)
+    return PackedBatch(owners=owners, positions=positions, lengths=lengths, key_mask=key_mask)
+
+
+def packed_mean_pool(values: torch.Tensor, packed: PackedBatch) -> torch.Tensor:
+    pooled = values.new_zeros(packed.batch_size, values.size(-1)).index_add_(0, packed.owners, values)
+    return pooled / packed.lengths.clamp(min=1).unsqueeze(-1).to(pooled.dtype)
+
+
+class PackedSelfAttention(nn.Module):
+    # Parameter names mirror nn.MultiheadAttention so TransformerEncoder state dicts load unchanged.
+    def __init__(self, embed_dim: int, num_heads: int, dropout: float):
+        super().__init__()
+        if embed_dim % num_heads:
+            raise ValueError("embedding_dim must be divisible by num_heads")
+        self.num_heads = num_heads
+        self.dropout = dropout
+        self.in_proj_weight = nn.Parameter(torch.empty(3 * embed_dim, embed_dim))
+        self.in_proj_bias = nn.Parameter(torch.zeros(3 * embed_dim))
+        self.out_proj = nn.Linear(embed_dim, embed_dim)
+        nn.init.xavier_uniform_(self.in_proj_weight)
+        nn.init.zeros_(self.out_proj.bias)
+
+    def forward(self, values: torch.Tensor, packed: PackedBatch) -> torch.Tensor:
+        qkv = F.linear(values, self.in_proj_weight, self.in_proj_bias)
+        total, embed_dim = values.shape
+        head_dim = embed_dim // self.num_heads
+
+        # Only the attention step sees padding; projections and the FFN run on real tokens alone.
+        padded = qkv.new_zeros(packed.batch_size, packed.max_length, 3 * embed_dim)
+        padded[packed.owners, packed.positions] = qkv
+        query, key, value = padded.view(
+            packed.batch_size, packed.max_length, 3, self.num_heads, head_dim
+        ).permute(2, 0, 3, 1, 4)
+        attended = F.scaled_dot_product_attention(
+            query,
+            key,
+            value,
+            attn_mask=packed.key_mask,
+            dropout_p=self.dropout if self.training else 0.0,
+        )
+        attended = attended.transpose(1, 2)[packed.owners, packed.positions].reshape(total, embed_dim)
+        return self.out_proj(attended)
+
+
+class PackedEncoderLayer(nn.Module):
+    # Post-norm GELU layer equivalent to nn.TransformerEncoderLayer(batch_first=True, activation="gelu").
+    def __init__(self, d_model: int, nhead: int, dim_feedforward: int, dropout: float, layer_norm_eps: float = 1e-5):
+        super().__init__()
+        self.self_attn = PackedSelfAttention(d_model, nhead, dropout)
+        self.linear1 = nn.Linear(d_model, dim_feedforward)
+        self.dropout = nn.Dropout(dropout)
+        self.linear2 = nn.Linear(dim_feedforward, d_model)
+        self.norm1 = nn.LayerNorm(d_model, eps=layer_norm_eps)
+        self.norm2 = nn.LayerNorm(d_model, eps=layer_norm_eps)
+        self.dropout1 = nn.Dropout(dropout)
+        self.dropout2 = nn.Dropout(dropout)
+
+    def forward(self, values: torch.Tensor, packed: PackedBatch) -> torch.Tensor:
+        values = self.norm1(values + self.dropout1(self.self_attn(values, packed)))
+        feed_forward = self.linear2(self.dropout(F.gelu(self.linear1(values))))
+        return self.norm2(values + self.dropout2(feed_forward))
+
+
+class PackedTransformerEncoder(nn.Module):
+    def __init__(self, d_model: int, nhead: int, dim_feedforward: int, dropout: float, num_layers: int):
+        super().__init__()
+        self.layers = nn.ModuleList(
+            [PackedEncoderLayer(d_model, nhead, dim_feedforward, dropout) for _ in range(num_layers)]
+        )
+
+    def forward(self, values: torch.Tensor, packed: PackedBatch, checkpoint_layers: bool = False) -> torch.Tensor:
+        for layer in self.layers:
+            if checkpoint_layers:
+                values = checkpoint(layer, values, packed, use_reentrant=False)
+            else:
+                values = layer(values, packed)
+        return values
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from contextlib import nullcontext
+from typing import Callable, Dict, Union
+
+import torch
+import torch.nn as nn
+
+
+FP32 = "fp32"
+BF16 = "bf16"
+PRECISIONS = (FP32, BF16)
+
+Outputs = Union[torch.Tensor, Dict[str, torch.Tensor]]
+
+
+def validate_precision(precision: str) -> str:
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision} (expected one of {', '.join(PRECISIONS)})")
+    return precision
+
+
+def autocast_context(precision: str, device_type: str = "cpu"):
+    if validate_precision(precision) == FP32:
+        return nullcontext()
+    return torch.autocast(device_type=device_type, dtype=torch.bfloat16)
+
+
+def disable_encoder_fast_path(model: nn.Module) -> nn.Module:
+    # The fused TransformerEncoder fast path only checks CUDA autocast, so under CPU autocast it
+    # feeds bf16 activations into fp32 kernels; route encoders through the regular path instead.
+    for module in model.modules():
+        if isinstance(module, nn.TransformerEncoder):
+            module.enable_nested_tensor = False
+            module.use_nested_tensor = False
+        elif isinstance(module, nn.TransformerEncoderLayer):
+            module.activation_relu_or_gelu = 0
+    return model
+
+
+def native_bf16_supported() -> bool:
+    # Without AVX512-BF16/AMX, oneDNN emulates bf16 and autocast is usually slower than fp32.
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def outputs_to_float(outputs: Outputs) -> Outputs:
+    if isinstance(outputs, dict):
+        return {name: value.float() for name, value in outputs.items()}
+    return outputs.float()
+
+
+def precision_forward(model: nn.Module, precision: str) -> Callable[[torch.Tensor], Outputs]:
+    if precision != FP32:
+        disable_encoder_fast_path(model)
+
+    def forward(input_ids: torch.Tensor) -> Outputs:
+        with autocast_context(precision, input_ids.device.type):
+            outputs = model(input_ids)
+        return outputs_to_float(outputs)
+
+    return forward
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import string
 from dataclasses import dataclass
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import torch
 
 
 AMINO_ACIDS = list("ACDEFGHIKLMNPQRSTVWY")
+# Every ASCII byte that is not a letter, for deleting in one bytes.translate call.
+NON_LETTER_BYTES = bytes(byte for byte in range(128) if not chr(byte).isalpha())
 
 
 @dataclass(frozen=True)
@@ -30,24 +36,115 @@ def build_protein_vocab() -> ProteinVocab:
     return ProteinVocab(token_to_idx=token_to_idx, idx_to_token=idx_to_token)
 
 
+def build_byte_lookup(vocab: ProteinVocab) -> np.ndarray:
+    lookup = np.full(256, -1, dtype=np.int64)
+    for letter in string.ascii_uppercase:
+        token_id = vocab.token_to_idx.get(letter, vocab.unk_id)
+        lookup[ord(letter)] = token_id
+        lookup[ord(letter.lower())] = token_id
+    return lookup
+
+
+def window_starts(length: int, window: int, stride: int) -> List[int]:
+    if length <= window:
+        return [0]
+    starts = list(range(0, length - window + 1, stride))
+    # Always end flush with the sequence so the tail residues are covered.
+    if starts[-1] + window < length:
+        starts.append(length - window)
+    return starts
+
+
 class ProteinTokenizer:
-    def __init__(self, max_length: int):
+    def __init__(self, max_length: int, length_bucket: int = 1):
+        if length_bucket < 1:
+            raise ValueError("length_bucket must be at least 1")
         self.vocab = build_protein_vocab()
         self.max_length = max_length
+        self.length_bucket = length_bucket
+        self._byte_lookup = build_byte_lookup(self.vocab)
+        self._unknown_byte = next(
+            letter for letter in string.ascii_uppercase if letter not in self.vocab.token_to_idx
+        ).encode("ascii")
 
     def clean_sequence(self, sequence: str) -> str:
+        if sequence.isascii():
+            return sequence.encode("ascii").translate(None, NON_LETTER_BYTES).decode("ascii").upper()
         sequence = sequence.strip().upper()
         return "".join(ch for ch in sequence if ch.isalpha())
 
-    def encode(self, sequence: str) -> List[int]:
+    def _to_ascii(self, sequence: str) -> bytes:
+        if sequence.isascii():
+            return sequence.encode("ascii")
         cleaned = self.clean_sequence(sequence)
-        token_ids = [
-            self.vocab.token_to_idx.get(ch, self.vocab.unk_id)
-            for ch in cleaned[: self.max_length]
-        ]
-        if len(token_ids) < self.max_length:
+        return cleaned.encode("ascii", errors="replace").replace(b"?", self._unknown_byte)
+
+    def _token_ids(self, sequence: str) -> np.ndarray:
+        token_ids = self._byte_lookup[np.frombuffer(self._to_ascii(sequence), dtype=np.uint8)]
+        return token_ids[token_ids >= 0]
+
+    def encode(self, sequence: str, pad: bool = True) -> List[int]:
+        token_ids = self._token_ids(sequence)[: self.max_length].tolist()
+        if pad and len(token_ids) < self.max_length:
             token_ids.extend([self.vocab.pad_id] * (self.max_length - len(token_ids)))
         return token_ids
 
-    def batch_encode(self, sequences: Iterable[str]) -> List[List[int]]:
-        return [self.encode(sequence) for sequence in sequences]
+    def padded_length(self, longest: int) -> int:
+        bucketed = -(-max(longest, 1) // self.length_bucket) * self.length_bucket
+        return min(bucketed, self.max_length)
+
+    def _token_positions(self, sequences: Iterable[str]):
+        encoded = [self._to_ascii(sequence) for sequence in sequences]
+        count = len(encoded)
+        byte_lengths = np.fromiter((len(raw) for raw in encoded), dtype=np.int64, count=count)
+
+        token_ids = self._byte_lookup[np.frombuffer(b"".join(encoded), dtype=np.uint8)]
+        owners = np.repeat(np.arange(count), byte_lengths)
+        keep = token_ids >= 0
+        token_ids, owners = token_ids[keep], owners[keep]
+
+        lengths = np.bincount(owners, minlength=count)
+        positions = np.arange(token_ids.size) - (np.cumsum(lengths) - lengths)[owners]
+        in_range = positions < self.max_length
+        return token_ids[in_range], owners[in_range], positions[in_range], np.minimum(lengths, self.max_length)
+
+    def pack(self, sequences: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        token_ids, _, _, lengths = self._token_positions(sequences)
+        return token_ids, lengths
+
+    def batch_encode(self, sequences: Iterable[str], dynamic_padding: bool = False) -> torch.Tensor:
+        token_ids, owners, positions, lengths = self._token_positions(sequences)
+        if dynamic_padding:
+            width = self.padded_length(int(lengths.max(initial=0)))
+        else:
+            width = self.max_length
+        output = torch.full((lengths.size, width), self.vocab.pad_id, dtype=torch.long)
+        output.numpy()[owners, positions] = token_ids
+        return output
+
+    def batch_encode_windows(
+        self,
+        sequences: Iterable[str],
+        window: int,
+        stride: int,
+    ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """Return (windows, owning sequence index, window lengths); short sequences get one window."""
+        window = min(window, self.max_length)
+        if window < 1 or not 0 < stride <= window:
+            raise ValueError("window must be at least 1 and stride in [1, window]")
+        rows: List[np.ndarray] = []
+        owners: List[int] = []
+        for owner, sequence in enumerate(sequences):
+            token_ids = self._token_ids(sequence)
+            for start in window_starts(token_ids.size, window, stride):
+                rows.append(token_ids[start : start + window])
+                owners.append(owner)
+
+        lengths = np.fromiter((row.size for row in rows), dtype=np.int64, count=len(rows))
+        width = self.padded_length(int(lengths.max(initial=0)))
+        output = torch.full((len(rows), width), self.vocab.pad_id, dtype=torch.long)
+        flat = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        row_index = np.repeat(np.arange(len(rows)), lengths)
+        positions = np.arange(flat.size) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        output.numpy()[row_index, positions] = flat
+        return output, torch.tensor(owners, dtype=torch.long), torch.from_numpy(lengths)
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+
+from ml.precision import disable_encoder_fast_path
+
+
+DYNAMIC_INT8 = "dynamic_int8"
+
+
+def quantize_dynamic_int8(model: nn.Module) -> nn.Module:
+    quantized = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    # The fused TransformerEncoder fast path reads Linear.weight as a tensor, which dynamic
+    # quantized Linear layers do not expose.
+    return disable_encoder_fast_path(quantized)
+
+
+def quantized_checkpoint_path(checkpoint_path: Path) -> Path:
+    return checkpoint_path.with_name(f"{checkpoint_path.stem}_int8{checkpoint_path.suffix}")
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from typing import Callable, Tuple
+
+import torch
+
+
+WINDOW_AGGREGATIONS = ("mean_logits", "mean_probs")
+
+
+def resolve_window(size: int, stride: int, max_length: int) -> Tuple[int, int]:
+    # 0 picks the defaults: the model's max_length, and half the window.
+    size = min(size or max_length, max_length)
+    stride = stride or max(size // 2, 1)
+    if size < 1:
+        raise ValueError(f"window size must be at least 1, got {size}")
+    if not 0 < stride <= size:
+        # A stride past the window would skip the residues between windows.
+        raise ValueError(
+            f"window stride must be between 1 and the window size {size}, got {stride}"
+        )
+    return size, stride
+
+
+def aggregate_windows(
+    values: torch.Tensor, owners: torch.Tensor, lengths: torch.Tensor, count: int
+) -> torch.Tensor:
+    # Residue-weighted mean over each sequence's windows, so a short tail window counts for less.
+    weights = lengths.clamp(min=1).to(values.dtype)
+    weighted = values * weights.unsqueeze(-1)
+    totals = values.new_zeros(count, values.size(-1)).index_add_(0, owners, weighted)
+    norms = values.new_zeros(count).index_add_(0, owners, weights)
+    return totals / norms.unsqueeze(-1)
+
+
+def encode_windows(
+    encode: Callable[[torch.Tensor], torch.Tensor],
+    input_ids: torch.Tensor,
+    owners: torch.Tensor,
+    lengths: torch.Tensor,
+    count: int,
+    batch_size: int,
+) -> torch.Tensor:
+    # Every window is a fixed-size forward, so cost grows linearly with sequence length.
+    pooled = torch.cat(
+        [
+            encode(input_ids[start : start + batch_size])
+            for start in range(0, input_ids.size(0), batch_size)
+        ]
+    )
+    return aggregate_windows(pooled, owners, lengths, count)
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules import as top-level packages (api, ml, training), as they do when run from backend/.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from typing import Dict
+
+import pytest
+import torch
+
+from ml.basic_protein_model import build_classifier
+from ml.export import example_input_ids, export_onnx, export_torchscript, wrap_for_export
+from ml.inference_backends import EagerBackend, InferenceBackend, OnnxBackend, TorchScriptBackend
+from ml.protein_tokenizer import build_protein_vocab
+
+
+ATOL = 1e-4
+MAX_LENGTH = 64
+BASE_CONFIG = {
+    "max_length": MAX_LENGTH,
+    "embedding_dim": 32,
+    "num_heads": 4,
+    "num_layers": 2,
+    "ff_dim": 64,
+    "dropout": 0.1,
+}
+MODEL_CONFIGS = {
+    "single_head": {**BASE_CONFIG, "num_classes": 3},
+    "multi_head": {**BASE_CONFIG, "heads": {"organism": 3, "protein_type": 12}},
+}
+
+
+def parity_batches() -> Dict[str, torch.Tensor]:
+    vocab = build_protein_vocab()
+    generator = torch.Generator().manual_seed(1)
+    unpadded = torch.randint(vocab.unk_id, len(vocab.token_to_idx), (4, 40), generator=generator)
+    padded = unpadded.clone()
+    padded[1, 25:] = vocab.pad_id
+    padded[3, 5:] = vocab.pad_id
+    return {
+        "unpadded": unpadded,
+        "padded": padded,
+        "single": unpadded[:1, :7],
+        "full_length": torch.randint(
+            vocab.unk_id, len(vocab.token_to_idx), (2, MAX_LENGTH), generator=generator
+        ),
+    }
+
+
+@pytest.fixture(scope="module", params=sorted(MODEL_CONFIGS))
+def model(request):
+    torch.manual_seed(0)
+    vocab = build_protein_vocab()
+    classifier = build_classifier(
+        MODEL_CONFIGS[request.param], len(vocab.token_to_idx), vocab.pad_id
+    )
+    return classifier.eval()
+
+
+def assert_matches_eager(model, candidate: InferenceBackend) -> None:
+    reference = EagerBackend(model)
+    with torch.no_grad():
+        for name, input_ids in parity_batches().items():
+            expected = reference(input_ids)
+            actual = candidate(input_ids)
+            assert set(actual) == set(expected), name
+            for output, logits in expected.items():
+                diff = (logits - actual[output]).abs().max().item()
+                assert diff <= ATOL, f"{name}/{output}: max |logit diff| {diff:.2e}"
+
+
+def example() -> torch.Tensor:
+    vocab = build_protein_vocab()
+    return example_input_ids(MAX_LENGTH, vocab.pad_id, len(vocab.token_to_idx))
+
+
+def test_torchscript_matches_eager(model, tmp_path):
+    wrapper = wrap_for_export(model)
+    path = tmp_path / "model.ts"
+    export_torchscript(wrapper, example(), path)
+    assert_matches_eager(model, TorchScriptBackend(path, wrapper.output_names))
+
+
+def test_torchscript_trace_avoids_encoder_fast_path(model, tmp_path):
+    # A trace through the fused fast path bakes in prototype nested-tensor ops chosen
+    # from the example's padding.
+    path = tmp_path / "model.ts"
+    export_torchscript(wrap_for_export(model), example(), path)
+    graph = str(torch.jit.load(str(path)).inlined_graph)
+    for op in ("_nested_tensor_from_mask", "_transformer_encoder_layer_fwd", "to_padded_tensor"):
+        assert f"aten::{op}" not in graph
+
+
+def test_onnx_matches_eager(model, tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    wrapper = wrap_for_export(model)
+    path = tmp_path / "model.onnx"
+    export_onnx(wrapper, example(), path, MAX_LENGTH)
+    assert_matches_eager(model, OnnxBackend(path, wrapper.output_names))
+
+
+def test_export_leaves_eager_fast_path_enabled(model):
+    wrap_for_export(model)
+    layer = model.encoder.layers[0]
+    assert layer.activation_relu_or_gelu != 0
@@ -3,11 +3,11 @@ from __future__ import annotations
 import random
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Sequence, Tuple
+from typing import Any, Dict, List, Sequence, Tuple
 
 import pandas as pd
 import torch
-from torch.utils.data import Dataset, random_split
+from torch.utils.data import ConcatDataset, Dataset, Subset, default_collate, random_split
 
 from ml.protein_tokenizer import AMINO_ACIDS, ProteinTokenizer
 
@@ -16,23 +16,83 @@ from ml.protein_tokenizer import AMINO_ACIDS, ProteinTokenizer
 class SequenceExample:
     sequence: str
     label: int
+    task: int = 0
 
 
 class ProteinSequenceDataset(Dataset):
-    def __init__(self, examples: Sequence[SequenceExample], tokenizer: ProteinTokenizer):
+    def __init__(
+        self,
+        examples: Sequence[SequenceExample],
+        tokenizer: ProteinTokenizer,
+        dynamic_padding: bool = False,
+    ):
         self.examples = list(examples)
         self.tokenizer = tokenizer
+        self.dynamic_padding = dynamic_padding
 
     def __len__(self) -> int:
         return len(self.examples)
 
+    def sequence_lengths(self) -> List[int]:
+        return [
+            min(len(self.tokenizer.clean_sequence(example.sequence)), self.tokenizer.max_length)
+            for example in self.examples
+        ]
+
     def __getitem__(self, idx: int) -> dict:
         example = self.examples[idx]
+        token_ids = self.tokenizer.encode(example.sequence, pad=not self.dynamic_padding)
         return {
-            "input_ids": torch.tensor(self.tokenizer.encode(example.sequence), dtype=torch.long),
+            "input_ids": torch.tensor(token_ids, dtype=torch.long),
             "label": torch.tensor(example.label, dtype=torch.long),
+            "task": torch.tensor(example.task, dtype=torch.long),
         }
 
+    def __getitems__(self, indices: List[int]) -> Dict[str, torch.Tensor]:
+        # DataLoader hands the whole batch here, so it is tokenized in one call.
+        examples = [self.examples[idx] for idx in indices]
+        return {
+            "input_ids": self.tokenizer.batch_encode(
+                [example.sequence for example in examples],
+                dynamic_padding=self.dynamic_padding,
+            ),
+            "label": torch.tensor([example.label for example in examples], dtype=torch.long),
+            "task": torch.tensor([example.task for example in examples], dtype=torch.long),
+        }
+
+
+def collate_batch(batch: Any) -> Dict[str, torch.Tensor]:
+    if isinstance(batch, dict):
+        return batch
+    return default_collate(batch)
+
+
+class DynamicPaddingCollator:
+    def __init__(self, tokenizer: ProteinTokenizer):
+        self.tokenizer = tokenizer
+
+    def __call__(self, batch: Any) -> Dict[str, torch.Tensor]:
+        if isinstance(batch, dict):
+            return batch
+        length = self.tokenizer.padded_length(max(item["input_ids"].numel() for item in batch))
+        input_ids = torch.full((len(batch), length), self.tokenizer.vocab.pad_id, dtype=torch.long)
+        for row, item in enumerate(batch):
+            input_ids[row, : item["input_ids"].numel()] = item["input_ids"]
+        collated = {key: torch.stack([item[key] for item in batch]) for key in batch[0] if key != "input_ids"}
+        collated["input_ids"] = input_ids
+        return collated
+
+
+def dataset_lengths(dataset: Dataset) -> List[int]:
+    if isinstance(dataset, Subset):
+        parent_lengths = dataset_lengths(dataset.dataset)
+        return [parent_lengths[idx] for idx in dataset.indices]
+    if isinstance(dataset, ConcatDataset):
+        return [length for part in dataset.datasets for length in dataset_lengths(part)]
+    if hasattr(dataset, "sequence_lengths"):
+        return dataset.sequence_lengths()
+    raise TypeError(f"Cannot determine sequence lengths for {type(dataset).__name__}")
+
 
 def load_examples_from_csv(csv_path: Path) -> List[SequenceExample]:
     if not csv_path.exists():
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Dict, List
+
+import torch
+
+from ml.basic_protein_model import build_classifier
+from ml.export import (
+    example_input_ids,
+    export_onnx,
+    export_torchscript,
+    wrap_for_export,
+    write_export_metadata,
+)
+from ml.inference_backends import (
+    EagerBackend,
+    InferenceBackend,
+    OnnxBackend,
+    TorchScriptBackend,
+    onnx_path,
+    torchscript_path,
+)
+from ml.protein_tokenizer import build_protein_vocab
+
+
+PARITY_SHAPES = [(1, 1), (1, 7), (4, 33), (16, 128)]
+
+
+def max_logit_diff(reference: InferenceBackend, candidate: InferenceBackend, max_length: int) -> float:
+    vocab = build_protein_vocab()
+    vocab_size = len(vocab.token_to_idx)
+    generator = torch.Generator().manual_seed(0)
+    worst = 0.0
+    with torch.no_grad():
+        for batch_size, length in PARITY_SHAPES:
+            length = min(length, max_length)
+            input_ids = torch.randint(vocab.unk_id, vocab_size, (batch_size, length), generator=generator)
+            if batch_size > 1:
+                input_ids[-1, max(1, length // 2) :] = vocab.pad_id
+            expected = reference(input_ids)
+            actual = candidate(input_ids)
+            for name, logits in expected.items():
+                worst = max(worst, (logits - actual[name]).abs().max().item())
+    return worst
+
+
+def export_checkpoint(checkpoint_path: Path, formats: List[str], atol: float) -> Dict[str, float]:
+    checkpoint = torch.load(str(checkpoint_path), map_location="cpu")
+    if checkpoint.get("quantization"):
+        raise ValueError(f"Export expects an fp32 checkpoint, got {checkpoint['quantization']}")
+
+    vocab = build_protein_vocab()
+    vocab_size = len(vocab.token_to_idx)
+    model_cfg = checkpoint["config"]["model"]
+    # The packed sdpa encoder has data-dependent shapes that tracing would freeze; export the native one.
+    model = build_classifier({**model_cfg, "attention": "native"}, vocab_size=vocab_size, pad_id=vocab.pad_id)
+    model.load_state_dict(checkpoint["model_state_dict"])
+    model.eval()
+
+    wrapper = wrap_for_export(model)
+    example = example_input_ids(model_cfg["max_length"], vocab.pad_id, vocab_size)
+    reference = EagerBackend(model)
+
+    diffs: Dict[str, float] = {}
+    if "torchscript" in formats:
+        path = torchscript_path(checkpoint_path)
+        export_torchscript(wrapper, example, path)
+        diffs["torchscript"] = max_logit_diff(
+            reference, TorchScriptBackend(path, wrapper.output_names), model_cfg["max_length"]
+        )
+    if "onnx" in formats:
+        path = onnx_path(checkpoint_path)
+        export_onnx(wrapper, example, path, model_cfg["max_length"])
+        diffs["onnx"] = max_logit_diff(
+            reference, OnnxBackend(path, wrapper.output_names), model_cfg["max_length"]
+        )
+
+    failed = {name: diff for name, diff in diffs.items() if diff > atol}
+    if failed:
+        raise SystemExit(f"Export parity check failed for {checkpoint_path}: {failed} (atol={atol})")
+
+    write_export_metadata(checkpoint_path, model_cfg, wrapper.output_names, formats)
+    return diffs
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export classifier checkpoints to TorchScript/ONNX")
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        action="append",
+        help="Checkpoint to export (repeatable). Defaults to the organism and protein-type models.",
+    )
+    parser.add_argument(
+        "--format",
+        type=str,
+        nargs="+",
+        choices=["torchscript", "onnx"],
+        default=["torchscript", "onnx"],
+    )
+    parser.add_argument("--atol", type=float, default=1e-4, help="Max allowed export-vs-eager logit diff")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    checkpoints = args.checkpoint or [
+        "checkpoints/public_small/basic_protein_classifier.pt",
+        "checkpoints/protein_type/basic_protein_classifier.pt",
+    ]
+    for checkpoint in checkpoints:
+        checkpoint_path = Path(checkpoint)
+        if not checkpoint_path.exists():
+            print(f"Skipping missing checkpoint: {checkpoint_path}")
+            continue
+        diffs = export_checkpoint(checkpoint_path, args.format, args.atol)
+        summary = " | ".join(f"{name} max_diff={diff:.2e}" for name, diff in diffs.items())
+        print(f"Exported {checkpoint_path}: {summary}")
+
+
+if __name__ == "__main__":
+    main()
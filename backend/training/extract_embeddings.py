@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import argparse
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from api.cache import file_fingerprint
+from ml.basic_protein_model import ATTENTION_IMPLEMENTATIONS, build_classifier
+from ml.embedding_store import EMBEDDING_DTYPES, EmbeddingStore, sequence_digest
+from ml.inference_backends import EagerBackend
+from ml.precision import FP32, PRECISIONS
+from ml.protein_tokenizer import ProteinTokenizer, build_protein_vocab
+from ml.windowing import encode_windows, resolve_window
+from utils.fasta import iter_fasta_records, uniprot_accession
+
+
+DEFAULT_CHECKPOINT = (
+    Path(__file__).resolve().parents[1]
+    / "checkpoints"
+    / "public_small"
+    / "basic_protein_classifier.pt"
+)
+# Records read ahead and sorted by length, so each batch pads to similar lengths.
+SORT_WINDOW_BATCHES = 8
+
+
+def extract_embeddings(
+    checkpoint_path: Path,
+    fasta_path: Path,
+    store_root: Path,
+    dtype: str,
+    precision: str,
+    attention: str,
+    batch_size: int,
+    window: Optional[Tuple[int, int]],
+) -> Dict[str, Any]:
+    checkpoint = torch.load(str(checkpoint_path), map_location="cpu", mmap=True)
+    if checkpoint.get("quantization"):
+        raise ValueError(
+            f"{checkpoint_path} is quantized ({checkpoint['quantization']}); "
+            "pass the fp32 checkpoint"
+        )
+
+    vocab = build_protein_vocab()
+    model_cfg = checkpoint["config"]["model"]
+    model = build_classifier(
+        {**model_cfg, "attention": attention},
+        vocab_size=len(vocab.token_to_idx),
+        pad_id=vocab.pad_id,
+    )
+    model.load_state_dict(checkpoint["model_state_dict"])
+    model.eval()
+    backend = EagerBackend(model, precision)
+    tokenizer = ProteinTokenizer(max_length=model_cfg["max_length"], length_bucket=8)
+
+    # Same fingerprint as the API's, so both write to and read from one store.
+    fingerprint = file_fingerprint([checkpoint_path])
+    if precision != FP32:
+        fingerprint += f"-{precision}"
+    if window is not None:
+        window = resolve_window(*window, model_cfg["max_length"])
+        fingerprint += f"-w{window[0]}s{window[1]}"
+    store = EmbeddingStore(store_root, fingerprint, dim=model_cfg["embedding_dim"], dtype=dtype)
+
+    def encode(sequences: List[str]) -> np.ndarray:
+        with torch.no_grad():
+            if window is None:
+                input_ids = tokenizer.batch_encode(sequences, dynamic_padding=True)
+                return backend.encode(input_ids).numpy()
+            input_ids, owners, lengths = tokenizer.batch_encode_windows(sequences, *window)
+            pooled = encode_windows(
+                backend.encode, input_ids, owners, lengths, len(sequences), batch_size
+            )
+            return pooled.numpy()
+
+    counts = {"records": 0, "embedded": 0, "reused": 0, "skipped": 0}
+    start = time.perf_counter()
+    with fasta_path.open(encoding="utf-8") as file:
+        records = iter_fasta_records(file)
+        while True:
+            chunk = list(islice(records, batch_size * SORT_WINDOW_BATCHES))
+            if not chunk:
+                break
+            counts["records"] += len(chunk)
+            cleaned = [(tokenizer.clean_sequence(sequence), header) for header, sequence in chunk]
+            valid = sorted(
+                ((seq, header) for seq, header in cleaned if seq), key=lambda item: len(item[0])
+            )
+            counts["skipped"] += len(chunk) - len(valid)
+
+            for offset in range(0, len(valid), batch_size):
+                batch = valid[offset : offset + batch_size]
+                digests = [sequence_digest(sequence) for sequence, _ in batch]
+                vectors = store.get_many(digests)
+                missing = [idx for idx, vector in enumerate(vectors) if vector is None]
+                if missing:
+                    computed = encode([batch[idx][0] for idx in missing])
+                    for idx, vector in zip(missing, computed):
+                        vectors[idx] = vector
+                counts["embedded"] += len(missing)
+                counts["reused"] += len(batch) - len(missing)
+                # Known vectors are passed back too, so a new accession for them is still indexed.
+                accessions = [uniprot_accession(header) for _, header in batch]
+                store.append(digests, np.stack(vectors), accessions)
+
+    elapsed = time.perf_counter() - start
+    return {
+        **counts,
+        "seconds": elapsed,
+        "embedded_per_second": counts["embedded"] / elapsed if elapsed > 0 else 0.0,
+        "store": store.stats(),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Embed FASTA proteins into a memory-mapped embedding store"
+    )
+    parser.add_argument("--fasta", type=str, required=True, help="FASTA file to embed")
+    parser.add_argument("--store", type=str, required=True, help="Embedding store root directory")
+    parser.add_argument("--checkpoint", type=str, default=str(DEFAULT_CHECKPOINT))
+    parser.add_argument("--dtype", choices=EMBEDDING_DTYPES, default="float32")
+    parser.add_argument("--precision", choices=PRECISIONS, default=FP32)
+    parser.add_argument("--attention", choices=ATTENTION_IMPLEMENTATIONS, default="native")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument(
+        "--windowed",
+        action="store_true",
+        help="Average embeddings over sliding windows instead of truncating long proteins",
+    )
+    parser.add_argument("--window-size", type=int, default=0, help="0 uses the model's max_length")
+    parser.add_argument("--window-stride", type=int, default=0, help="0 uses half the window")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    report = extract_embeddings(
+        Path(args.checkpoint),
+        Path(args.fasta),
+        Path(args.store),
+        dtype=args.dtype,
+        precision=args.precision,
+        attention=args.attention,
+        batch_size=max(args.batch_size, 1),
+        window=(args.window_size, args.window_stride) if args.windowed else None,
+    )
+    store = report["store"]
+    print(
+        f"Records: {report['records']} | embedded: {report['embedded']} | "
+        f"reused: {report['reused']} | skipped: {report['skipped']} | "
+        f"{report['embedded_per_second']:.1f} seq/s"
+    )
+    print(
+        f"Store: {store['path']} ({store['rows']} x {store['dim']} {store['dtype']}, "
+        f"{store['bytes']} bytes)"
+    )
+
+
+if __name__ == "__main__":
+    main()
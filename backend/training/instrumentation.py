@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import json
+import resource
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import torch
+
+
+STAGES = ("data", "forward", "backward", "optimizer")
+
+
+def peak_memory_mb(device: torch.device) -> Dict[str, float]:
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = {"host_rss_mb": rss / (1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0)}
+    if device.type == "cuda":
+        peak["cuda_allocated_mb"] = torch.cuda.max_memory_allocated(device) / (1024.0 * 1024.0)
+    return peak
+
+
+class TrainingInstrumentation:
+    def __init__(
+        self,
+        output_dir: Path,
+        device: torch.device,
+        enabled: bool = False,
+        profiler_steps: Optional[List[int]] = None,
+    ):
+        self.output_dir = output_dir
+        self.device = device
+        self.enabled = enabled
+        self.profiler_window = tuple(profiler_steps) if profiler_steps else None
+        if self.profiler_window is not None and len(self.profiler_window) != 2:
+            raise ValueError("profiling.profiler_steps must be [start_step, stop_step]")
+        if self.profiler_window is not None and not enabled:
+            # The profiler is driven from the instrumented loop, so it would silently never start.
+            raise ValueError("profiling.profiler_steps needs profiling.enabled: true")
+
+        self.global_step = 0
+        self.epochs: List[Dict[str, Any]] = []
+        self._profiler: Optional[torch.profiler.profile] = None
+        self._reset_epoch()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], output_dir: Path, device: torch.device) -> "TrainingInstrumentation":
+        profiling_cfg = config.get("profiling", {})
+        return cls(
+            output_dir=output_dir,
+            device=device,
+            enabled=profiling_cfg.get("enabled", False),
+            profiler_steps=profiling_cfg.get("profiler_steps"),
+        )
+
+    def _reset_epoch(self) -> None:
+        self._stage_seconds = {stage: 0.0 for stage in STAGES}
+        self._samples = 0
+        self._tokens = 0
+        self._steps = 0
+        self._epoch_start = time.perf_counter()
+
+    def _sync(self) -> None:
+        if self.device.type == "cuda":
+            torch.cuda.synchronize(self.device)
+
+    def iter_batches(self, loader: Iterable) -> Iterator:
+        if not self.enabled:
+            yield from loader
+            return
+        self._epoch_start = time.perf_counter()
+        iterator = iter(loader)
+        while True:
+            self._maybe_toggle_profiler()
+            start = time.perf_counter()
+            with self._record("data"):
+                try:
+                    batch = next(iterator)
+                except StopIteration:
+                    return
+            self._stage_seconds["data"] += time.perf_counter() - start
+            yield batch
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        with self._record(name):
+            yield
+            self._sync()
+        self._stage_seconds[name] += time.perf_counter() - start
+
+    def _record(self, name: str):
+        if self._profiler is None:
+            return nullcontext()
+        return torch.profiler.record_function(name)
+
+    def end_step(self, samples: int, tokens: int) -> None:
+        if not self.enabled:
+            return
+        self._samples += samples
+        self._tokens += tokens
+        self._steps += 1
+        self.global_step += 1
+
+    def _maybe_toggle_profiler(self) -> None:
+        if self.profiler_window is None:
+            return
+        start_step, stop_step = self.profiler_window
+        if self._profiler is None and self.global_step == start_step:
+            activities = [torch.profiler.ProfilerActivity.CPU]
+            if self.device.type == "cuda":
+                activities.append(torch.profiler.ProfilerActivity.CUDA)
+            self._profiler = torch.profiler.profile(activities=activities, record_shapes=True, profile_memory=True)
+            self._profiler.__enter__()
+        elif self._profiler is not None and self.global_step >= stop_step:
+            self._stop_profiler()
+
+    def _stop_profiler(self) -> None:
+        profiler, self._profiler = self._profiler, None
+        profiler.__exit__(None, None, None)
+        profiler.export_chrome_trace(str(self.output_dir / "profiler_trace.json"))
+        summary = profiler.key_averages().table(sort_by="self_cpu_time_total", row_limit=30)
+        (self.output_dir / "profiler_summary.txt").write_text(summary, encoding="utf-8")
+        print(f"Saved profiler trace: {self.output_dir / 'profiler_trace.json'}")
+
+    def end_epoch(self, epoch: int) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        elapsed = time.perf_counter() - self._epoch_start
+        measured = sum(self._stage_seconds.values())
+        stats = {
+            "epoch": epoch,
+            "steps": self._steps,
+            "samples": self._samples,
+            "tokens": self._tokens,
+            "seconds": elapsed,
+            "samples_per_s": self._samples / elapsed if elapsed > 0 else 0.0,
+            "tokens_per_s": self._tokens / elapsed if elapsed > 0 else 0.0,
+            "stage_seconds": dict(self._stage_seconds),
+            "stage_fraction": {
+                stage: seconds / measured if measured > 0 else 0.0
+                for stage, seconds in self._stage_seconds.items()
+            },
+            "peak_memory_mb": peak_memory_mb(self.device),
+        }
+        self.epochs.append(stats)
+        self._reset_epoch()
+        return stats
+
+    def close(self) -> Optional[Path]:
+        if not self.enabled:
+            return None
+        if self._profiler is not None:
+            self._stop_profiler()
+        path = self.output_dir / "training_profile.json"
+        report = {"profiler_steps": list(self.profiler_window) if self.profiler_window else None, "epochs": self.epochs}
+        path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        return path
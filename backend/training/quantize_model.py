@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import torch
+import torch.nn as nn
+
+from ml.basic_protein_model import build_classifier
+from ml.quantization import DYNAMIC_INT8, quantize_dynamic_int8, quantized_checkpoint_path
+from training.train_basic_model import (
+    build_tokenizer,
+    create_dataloaders,
+    evaluate,
+    task_names_from_config,
+)
+
+
+def state_dict_bytes(model: nn.Module) -> int:
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
+
+
+def as_head_dict(outputs) -> Dict[str, torch.Tensor]:
+    return outputs if isinstance(outputs, dict) else {"logits": outputs}
+
+
+def compare_outputs(reference: nn.Module, candidate: nn.Module, dataloader) -> Dict[str, float]:
+    agree = 0
+    total = 0
+    max_abs_diff = 0.0
+    with torch.no_grad():
+        for batch in dataloader:
+            reference_out = as_head_dict(reference(batch["input_ids"]))
+            candidate_out = as_head_dict(candidate(batch["input_ids"]))
+            for name, logits in reference_out.items():
+                agree += (logits.argmax(dim=-1) == candidate_out[name].argmax(dim=-1)).sum().item()
+                total += logits.size(0)
+                max_abs_diff = max(max_abs_diff, (logits - candidate_out[name]).abs().max().item())
+    return {"prediction_agreement": agree / max(total, 1), "max_abs_logit_diff": max_abs_diff}
+
+
+def benchmark_latency(model: nn.Module, batches: List[torch.Tensor], repeats: int) -> float:
+    with torch.no_grad():
+        for input_ids in batches[:2]:
+            model(input_ids)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for input_ids in batches:
+                model(input_ids)
+    return (time.perf_counter() - start) * 1000.0 / max(repeats * len(batches), 1)
+
+
+def quantize_checkpoint(
+    checkpoint_path: Path,
+    output_path: Path,
+    synthetic: bool,
+    max_accuracy_drop: float,
+    benchmark_repeats: int,
+) -> Dict[str, Any]:
+    checkpoint = torch.load(str(checkpoint_path), map_location="cpu")
+    if checkpoint.get("quantization"):
+        raise ValueError(f"{checkpoint_path} is already quantized ({checkpoint['quantization']})")
+
+    config = checkpoint["config"]
+    tokenizer = build_tokenizer(config)
+    _, val_loader = create_dataloaders(config, tokenizer, synthetic=synthetic)
+    task_names = task_names_from_config(config)
+
+    model = build_classifier(
+        config["model"],
+        vocab_size=len(tokenizer.vocab.token_to_idx),
+        pad_id=tokenizer.vocab.pad_id,
+    )
+    model.load_state_dict(checkpoint["model_state_dict"])
+    model.eval()
+    quantized = quantize_dynamic_int8(model)
+    quantized.eval()
+
+    loss_fn = nn.CrossEntropyLoss()
+    device = torch.device("cpu")
+    fp32_loss, fp32_acc = evaluate(model, val_loader, loss_fn, device, task_names)
+    int8_loss, int8_acc = evaluate(quantized, val_loader, loss_fn, device, task_names)
+
+    batches = [batch["input_ids"] for batch in val_loader]
+    fp32_ms = benchmark_latency(model, batches, benchmark_repeats)
+    int8_ms = benchmark_latency(quantized, batches, benchmark_repeats)
+
+    report = {
+        "checkpoint": str(checkpoint_path),
+        "output": str(output_path),
+        "val_samples": sum(input_ids.size(0) for input_ids in batches),
+        "fp32": {
+            "val_loss": fp32_loss,
+            "val_acc": fp32_acc,
+            "latency_ms_per_batch": fp32_ms,
+            "state_dict_bytes": state_dict_bytes(model),
+        },
+        "int8": {
+            "val_loss": int8_loss,
+            "val_acc": int8_acc,
+            "latency_ms_per_batch": int8_ms,
+            "state_dict_bytes": state_dict_bytes(quantized),
+        },
+        "accuracy_drop": fp32_acc - int8_acc,
+        "max_accuracy_drop": max_accuracy_drop,
+        **compare_outputs(model, quantized, val_loader),
+    }
+    report["passed"] = report["accuracy_drop"] <= max_accuracy_drop
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path = output_path.with_name(f"{output_path.stem}_report.json")
+    report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if report["passed"]:
+        torch.save(
+            {
+                "model_state_dict": quantized.state_dict(),
+                "config": config,
+                "vocab": checkpoint.get("vocab", tokenizer.vocab.token_to_idx),
+                "quantization": DYNAMIC_INT8,
+            },
+            output_path,
+        )
+    return report
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export a dynamic int8 quantized checkpoint")
+    parser.add_argument("--checkpoint", type=str, required=True, help="fp32 checkpoint to quantize")
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Output path (defaults to <checkpoint>_int8.pt next to the input)",
+    )
+    parser.add_argument(
+        "--synthetic",
+        action="store_true",
+        help="Validate on the synthetic dataset instead of the checkpoint's CSV",
+    )
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.01)
+    parser.add_argument("--benchmark-repeats", type=int, default=5)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    checkpoint_path = Path(args.checkpoint)
+    output_path = Path(args.output) if args.output else quantized_checkpoint_path(checkpoint_path)
+    report = quantize_checkpoint(
+        checkpoint_path,
+        output_path,
+        synthetic=args.synthetic,
+        max_accuracy_drop=args.max_accuracy_drop,
+        benchmark_repeats=args.benchmark_repeats,
+    )
+
+    print(f"Validation samples: {report['val_samples']}")
+    for precision in ("fp32", "int8"):
+        stats = report[precision]
+        print(
+            f"{precision} | val_acc={stats['val_acc']:.4f} | "
+            f"{stats['latency_ms_per_batch']:.2f} ms/batch | {stats['state_dict_bytes']} bytes"
+        )
+    print(
+        f"Prediction agreement: {report['prediction_agreement']:.4f} | "
+        f"max |logit diff|: {report['max_abs_logit_diff']:.4f}"
+    )
+    if not report["passed"]:
+        raise SystemExit(
+            f"Accuracy drop {report['accuracy_drop']:.4f} exceeds {report['max_accuracy_drop']:.4f}; "
+            "quantized checkpoint not written"
+        )
+    print(f"Saved quantized checkpoint: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from typing import Iterator, List, Sequence
+
+import torch
+from torch.utils.data import Sampler
+
+
+class LengthBucketBatchSampler(Sampler[List[int]]):
+    def __init__(
+        self,
+        lengths: Sequence[int],
+        batch_size: int,
+        chunk_batches: int = 50,
+        shuffle: bool = True,
+        drop_last: bool = False,
+        seed: int = 0,
+        num_replicas: int = 1,
+        rank: int = 0,
+    ):
+        if batch_size < 1 or chunk_batches < 1:
+            raise ValueError("batch_size and chunk_batches must be at least 1")
+        self.lengths = torch.as_tensor(list(lengths), dtype=torch.long)
+        self.batch_size = batch_size
+        self.chunk_size = batch_size * chunk_batches
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.seed = seed
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+
+    def _batches(self) -> List[List[int]]:
+        generator = torch.Generator().manual_seed(self.seed + self.epoch)
+        total = self.lengths.numel()
+        order = torch.randperm(total, generator=generator) if self.shuffle else torch.arange(total)
+
+        batches: List[List[int]] = []
+        for start in range(0, total, self.chunk_size):
+            chunk = order[start : start + self.chunk_size]
+            chunk = chunk[torch.argsort(self.lengths[chunk], descending=True, stable=True)]
+            for batch_start in range(0, chunk.numel(), self.batch_size):
+                batch = chunk[batch_start : batch_start + self.batch_size].tolist()
+                if len(batch) == self.batch_size or not self.drop_last:
+                    batches.append(batch)
+
+        if self.shuffle:
+            permutation = torch.randperm(len(batches), generator=generator).tolist()
+            batches = [batches[i] for i in permutation]
+        return batches
+
+    def _rank_batches(self, batches: List[List[int]]) -> List[List[int]]:
+        if self.num_replicas == 1:
+            return batches
+        if self.shuffle and batches:
+            # Every rank draws from the same global order; wrap around so training ranks step in lockstep.
+            padding = -len(batches) % self.num_replicas
+            batches = batches + batches[:padding]
+        return batches[self.rank :: self.num_replicas]
+
+    def __iter__(self) -> Iterator[List[int]]:
+        return iter(self._rank_batches(self._batches()))
+
+    def __len__(self) -> int:
+        total = self._global_len()
+        if self.num_replicas == 1:
+            return total
+        if self.shuffle:
+            return -(-total // self.num_replicas)
+        return len(range(self.rank, total, self.num_replicas))
+
+    def _global_len(self) -> int:
+        total = self.lengths.numel()
+        full_chunks, remainder = divmod(total, self.chunk_size)
+        per_chunk = self.chunk_size // self.batch_size
+        if self.drop_last:
+            return full_chunks * per_chunk + remainder // self.batch_size
+        return full_chunks * per_chunk + -(-remainder // self.batch_size)
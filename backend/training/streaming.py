@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import glob
+import hashlib
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import torch
+from torch.utils.data import IterableDataset, get_worker_info
+
+from ml.protein_tokenizer import ProteinTokenizer
+from training.distributed import rank_and_world_size
+from utils.fasta import iter_fasta_records
+
+
+FASTA_SUFFIXES = {".fasta", ".fa", ".faa", ".fas"}
+CSV_CHUNK_ROWS = 10000
+SPLIT_HASH_SPACE = float(1 << 64)
+
+
+@dataclass(frozen=True)
+class StreamSource:
+    path: Path
+    label: Optional[int] = None
+    task: int = 0
+
+    @property
+    def is_fasta(self) -> bool:
+        return self.path.suffix.lower() in FASTA_SUFFIXES
+
+
+def expand_sources(source_cfgs: Sequence[Dict[str, Any]], task_names: Sequence[str] = ()) -> List[StreamSource]:
+    sources: List[StreamSource] = []
+    for source_cfg in source_cfgs:
+        paths = sorted(glob.glob(str(source_cfg["path"])))
+        if not paths:
+            raise FileNotFoundError(f"No shards match {source_cfg['path']}")
+        task_name = source_cfg.get("task")
+        task = list(task_names).index(task_name) if task_name is not None else 0
+        for path in paths:
+            source = StreamSource(path=Path(path), label=source_cfg.get("label"), task=task)
+            if source.is_fasta and source.label is None:
+                raise ValueError(f"FASTA source {path} needs a 'label' in data.streaming.sources")
+            sources.append(source)
+    return sources
+
+
+def iter_source_records(source: StreamSource) -> Iterator[Tuple[str, int]]:
+    if source.is_fasta:
+        with source.path.open("r", encoding="utf-8") as file:
+            for _, sequence in iter_fasta_records(file):
+                yield sequence, source.label
+        return
+
+    for frame in pd.read_csv(source.path, usecols=["sequence", "label"], chunksize=CSV_CHUNK_ROWS):
+        for sequence, label in zip(frame["sequence"].astype(str), frame["label"]):
+            yield sequence, int(label) if source.label is None else source.label
+
+
+def split_fraction(clean_sequence: str) -> float:
+    # Callers pass the cleaned sequence so duplicates always land on the same side of the split.
+    digest = hashlib.blake2b(clean_sequence.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / SPLIT_HASH_SPACE
+
+
+class StreamingSequenceDataset(IterableDataset):
+    def __init__(
+        self,
+        sources: Sequence[StreamSource],
+        tokenizer: ProteinTokenizer,
+        split: str,
+        val_fraction: float,
+        shuffle_buffer: int = 0,
+        dynamic_padding: bool = False,
+        seed: int = 0,
+    ):
+        if split not in {"train", "val"}:
+            raise ValueError(f"Unknown split: {split}")
+        self.sources = list(sources)
+        self.tokenizer = tokenizer
+        self.split = split
+        self.val_fraction = val_fraction
+        self.shuffle_buffer = shuffle_buffer
+        self.dynamic_padding = dynamic_padding
+        self.seed = seed
+        self.epoch = 0
+        # Captured up front: spawned DataLoader workers do not inherit the process group.
+        self.rank, self.world_size = rank_and_world_size()
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+
+    def _shard(self) -> Tuple[List[StreamSource], int, int]:
+        worker = get_worker_info()
+        worker_id, num_workers = (worker.id, worker.num_workers) if worker is not None else (0, 1)
+        shard_id, num_shards = self.rank * num_workers + worker_id, self.world_size * num_workers
+        # Whole files per worker when there are enough of them, otherwise stride over records.
+        if len(self.sources) >= num_shards:
+            return self.sources[shard_id::num_shards], 0, 1
+        return self.sources, shard_id, num_shards
+
+    def _records(self) -> Iterator[Tuple[str, int, int]]:
+        sources, offset, stride = self._shard()
+        index = 0
+        for source in sources:
+            for sequence, label in iter_source_records(source):
+                in_val = split_fraction(self.tokenizer.clean_sequence(sequence)) < self.val_fraction
+                if in_val == (self.split == "val"):
+                    if index % stride == offset:
+                        yield sequence, label, source.task
+                    index += 1
+
+    def _shuffled(self, records: Iterator[Tuple[str, int, int]]) -> Iterator[Tuple[str, int, int]]:
+        worker = get_worker_info()
+        rng = random.Random(self.seed + self.epoch * 1009 + (worker.id if worker is not None else 0))
+        buffer: List[Tuple[str, int, int]] = []
+        for record in records:
+            if len(buffer) < self.shuffle_buffer:
+                buffer.append(record)
+                continue
+            slot = rng.randrange(len(buffer))
+            yield buffer[slot]
+            buffer[slot] = record
+        rng.shuffle(buffer)
+        yield from buffer
+
+    def __iter__(self) -> Iterator[dict]:
+        records = self._records()
+        if self.split == "train" and self.shuffle_buffer > 1:
+            records = self._shuffled(records)
+        for sequence, label, task in records:
+            token_ids = self.tokenizer.encode(sequence, pad=not self.dynamic_padding)
+            yield {
+                "input_ids": torch.tensor(token_ids, dtype=torch.long),
+                "label": torch.tensor(label, dtype=torch.long),
+                "task": torch.tensor(task, dtype=torch.long),
+            }
+
+
+def create_streaming_datasets(
+    config: Dict[str, Any],
+    tokenizer: ProteinTokenizer,
+    task_names: Sequence[str] = (),
+) -> Tuple[StreamingSequenceDataset, StreamingSequenceDataset]:
+    data_cfg = config["data"]
+    streaming_cfg = data_cfg["streaming"]
+    sources = expand_sources(streaming_cfg["sources"], task_names)
+    common = dict(
+        sources=sources,
+        tokenizer=tokenizer,
+        val_fraction=data_cfg["val_fraction"],
+        dynamic_padding=data_cfg.get("dynamic_padding", False),
+        seed=config["seed"],
+    )
+    train_dataset = StreamingSequenceDataset(
+        split="train",
+        shuffle_buffer=streaming_cfg.get("shuffle_buffer", 10000),
+        **common,
+    )
+    val_dataset = StreamingSequenceDataset(split="val", **common)
+    return train_dataset, val_dataset
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import torch
+from torch.utils.data import Dataset
+
+from ml.protein_tokenizer import ProteinTokenizer
+
+
+CACHE_FORMAT_VERSION = 1
+CHUNK_ROWS = 65536
+
+
+def token_cache_key(csv_path: Path, tokenizer: ProteinTokenizer) -> str:
+    digest = hashlib.sha256()
+    with csv_path.open("rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    settings = {
+        "version": CACHE_FORMAT_VERSION,
+        "max_length": tokenizer.max_length,
+        "vocab": tokenizer.vocab.token_to_idx,
+    }
+    digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def token_cache_dir(csv_path: Path, tokenizer: ProteinTokenizer, cache_root: Path) -> Path:
+    return cache_root / f"{csv_path.stem}-{token_cache_key(csv_path, tokenizer)}"
+
+
+def build_token_cache(csv_path: Path, tokenizer: ProteinTokenizer, cache_root: Path) -> Path:
+    if not csv_path.exists():
+        raise FileNotFoundError(f"Dataset not found: {csv_path}")
+    cache_dir = token_cache_dir(csv_path, tokenizer, cache_root)
+    if (cache_dir / "meta.json").exists():
+        return cache_dir
+
+    # Write into a scratch directory and rename, so readers never see a partial cache.
+    scratch = cache_dir.with_name(f"{cache_dir.name}.tmp-{os.getpid()}")
+    shutil.rmtree(scratch, ignore_errors=True)
+    scratch.mkdir(parents=True)
+
+    token_dtype = np.uint8 if len(tokenizer.vocab.token_to_idx) <= 256 else np.int32
+    token_chunks: List[np.ndarray] = []
+    length_chunks: List[np.ndarray] = []
+    label_chunks: List[np.ndarray] = []
+    reader = pd.read_csv(csv_path, usecols=["sequence", "label"], chunksize=CHUNK_ROWS)
+    for frame in reader:
+        token_ids, lengths = tokenizer.pack(frame["sequence"].astype(str))
+        token_chunks.append(token_ids.astype(token_dtype))
+        length_chunks.append(lengths)
+        label_chunks.append(frame["label"].to_numpy(dtype=np.int64))
+
+    lengths = np.concatenate(length_chunks) if length_chunks else np.zeros(0, dtype=np.int64)
+    offsets = np.zeros(lengths.size + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    np.save(scratch / "tokens.npy", np.concatenate(token_chunks) if token_chunks else np.zeros(0, dtype=token_dtype))
+    np.save(scratch / "offsets.npy", offsets)
+    np.save(scratch / "labels.npy", np.concatenate(label_chunks) if label_chunks else np.zeros(0, dtype=np.int64))
+    meta = {
+        "source": str(csv_path),
+        "examples": int(lengths.size),
+        "tokens": int(offsets[-1]),
+        "max_length": tokenizer.max_length,
+        "version": CACHE_FORMAT_VERSION,
+    }
+    (scratch / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+    try:
+        scratch.rename(cache_dir)
+    except OSError:
+        # Another process finished the same cache first.
+        shutil.rmtree(scratch, ignore_errors=True)
+    return cache_dir
+
+
+class TokenCacheDataset(Dataset):
+    def __init__(
+        self,
+        cache_dir: Path,
+        tokenizer: ProteinTokenizer,
+        dynamic_padding: bool = False,
+        task: int = 0,
+    ):
+        self.cache_dir = cache_dir
+        self.tokenizer = tokenizer
+        self.dynamic_padding = dynamic_padding
+        self.task = task
+        self.tokens = np.load(cache_dir / "tokens.npy", mmap_mode="r")
+        self.offsets = np.load(cache_dir / "offsets.npy")
+        self.labels = np.load(cache_dir / "labels.npy")
+
+    def __getstate__(self) -> dict:
+        # Spawned DataLoader workers reopen the memmap rather than receiving a pickled copy.
+        state = dict(self.__dict__)
+        state["tokens"] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.tokens = np.load(self.cache_dir / "tokens.npy", mmap_mode="r")
+
+    def __len__(self) -> int:
+        return self.labels.size
+
+    def sequence_lengths(self) -> List[int]:
+        return np.diff(self.offsets).tolist()
+
+    def __getitem__(self, idx: int) -> dict:
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        # Slicing the memmap is zero-copy; widening to int64 is the only copy.
+        token_ids = torch.from_numpy(self.tokens[start:end].astype(np.int64))
+        if not self.dynamic_padding:
+            padded = torch.full((self.tokenizer.max_length,), self.tokenizer.vocab.pad_id, dtype=torch.long)
+            padded[: token_ids.numel()] = token_ids
+            token_ids = padded
+        return {
+            "input_ids": token_ids,
+            "label": torch.tensor(int(self.labels[idx]), dtype=torch.long),
+            "task": torch.tensor(self.task, dtype=torch.long),
+        }
+
+    def __getitems__(self, indices: List[int]) -> Dict[str, torch.Tensor]:
+        rows = np.asarray(indices, dtype=np.int64)
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        if self.dynamic_padding:
+            width = self.tokenizer.padded_length(int(lengths.max(initial=0)))
+        else:
+            width = self.tokenizer.max_length
+
+        # One gather from the memmap into a preallocated padded batch.
+        owners = np.repeat(np.arange(rows.size), lengths)
+        positions = np.arange(owners.size) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        input_ids = torch.full((rows.size, width), self.tokenizer.vocab.pad_id, dtype=torch.long)
+        input_ids.numpy()[owners, positions] = self.tokens[np.repeat(starts, lengths) + positions]
+        return {
+            "input_ids": input_ids,
+            "label": torch.from_numpy(self.labels[rows]),
+            "task": torch.full((rows.size,), self.task, dtype=torch.long),
+        }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pre-tokenize training CSVs into a memory-mapped cache")
+    parser.add_argument("--config", type=str, required=True, help="Training YAML whose CSVs to cache")
+    return parser.parse_args()
+
+
+def main():
+    from training.train_basic_model import build_tokenizer, load_config, training_csv_paths
+
+    args = parse_args()
+    config = load_config(Path(args.config))
+    tokenizer = build_tokenizer(config)
+    cache_root = Path(config["data"].get("token_cache_dir", "data/token_cache"))
+    for csv_path in training_csv_paths(config):
+        cache_dir = build_token_cache(csv_path, tokenizer, cache_root)
+        meta = json.loads((cache_dir / "meta.json").read_text(encoding="utf-8"))
+        print(f"{csv_path} -> {cache_dir} ({meta['examples']} examples, {meta['tokens']} tokens)")
+
+
+if __name__ == "__main__":
+    main()
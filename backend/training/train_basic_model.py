@@ -1,23 +1,36 @@
 from __future__ import annotations
 
 import argparse
+import dataclasses
 import json
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Sequence, Tuple
 
 import torch
 import torch.nn as nn
 import yaml
-from torch.utils.data import DataLoader
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import ConcatDataset, DataLoader, Dataset, DistributedSampler, IterableDataset
 
-from ml.basic_protein_model import BasicProteinClassifier
+from ml.basic_protein_model import build_classifier, resize_position_embeddings
+from ml.precision import FP32, autocast_context, disable_encoder_fast_path, native_bf16_supported, validate_precision
 from ml.protein_tokenizer import ProteinTokenizer
 from training.dataset import (
+    DynamicPaddingCollator,
     ProteinSequenceDataset,
+    SequenceExample,
+    collate_batch,
+    dataset_lengths,
     generate_synthetic_examples,
     load_examples_from_csv,
     split_dataset,
 )
+from training.distributed import all_reduce_sum, init_distributed, rank_and_world_size, shutdown_distributed
+from training.instrumentation import TrainingInstrumentation, peak_memory_mb
+from training.sampling import LengthBucketBatchSampler
+from training.streaming import StreamingSequenceDataset, create_streaming_datasets
+from training.token_cache import TokenCacheDataset, build_token_cache
 
 
 def load_config(config_path: Path) -> Dict[str, Any]:
@@ -25,23 +38,110 @@ def load_config(config_path: Path) -> Dict[str, Any]:
         return yaml.safe_load(file)
 
 
-def create_datasets(config: Dict[str, Any], tokenizer: ProteinTokenizer, synthetic: bool):
+def task_names_from_config(config: Dict[str, Any]) -> List[str]:
+    return list(config["model"].get("heads", {}))
+
+
+def load_examples(
+    config: Dict[str, Any],
+    synthetic: bool,
+    task_id: int = 0,
+    train_csv: str = "",
+) -> List[SequenceExample]:
     data_cfg = config["data"]
     if synthetic:
         examples = generate_synthetic_examples(
             num_samples=data_cfg["synthetic_samples"],
             min_len=data_cfg["synthetic_min_length"],
             max_len=data_cfg["synthetic_max_length"],
-            seed=config["seed"],
+            seed=config["seed"] + task_id,
         )
     else:
-        examples = load_examples_from_csv(Path(data_cfg["train_csv"]))
+        examples = load_examples_from_csv(Path(train_csv or data_cfg["train_csv"]))
+    return [dataclasses.replace(example, task=task_id) for example in examples]
+
+
+def training_csv_paths(config: Dict[str, Any]) -> List[Path]:
+    data_cfg = config["data"]
+    task_names = task_names_from_config(config)
+    if task_names:
+        return [Path(data_cfg["tasks"][name]["train_csv"]) for name in task_names]
+    return [Path(data_cfg["train_csv"])]
+
 
-    dataset = ProteinSequenceDataset(examples=examples, tokenizer=tokenizer)
+def create_cached_dataset(config: Dict[str, Any], tokenizer: ProteinTokenizer) -> Dataset:
+    data_cfg = config["data"]
+    cache_root = Path(data_cfg.get("token_cache_dir", "data/token_cache"))
+    datasets = [
+        TokenCacheDataset(
+            build_token_cache(csv_path, tokenizer, cache_root),
+            tokenizer,
+            dynamic_padding=data_cfg.get("dynamic_padding", False),
+            task=task_id,
+        )
+        for task_id, csv_path in enumerate(training_csv_paths(config))
+    ]
+    return datasets[0] if len(datasets) == 1 else ConcatDataset(datasets)
+
+
+def create_datasets(config: Dict[str, Any], tokenizer: ProteinTokenizer, synthetic: bool):
+    data_cfg = config["data"]
+    if data_cfg.get("streaming", {}).get("enabled", False) and not synthetic:
+        return create_streaming_datasets(config, tokenizer, task_names_from_config(config))
+    if data_cfg.get("token_cache", False) and not synthetic:
+        dataset = create_cached_dataset(config, tokenizer)
+        return split_dataset(dataset, val_fraction=data_cfg["val_fraction"], seed=config["seed"])
+
+    task_names = task_names_from_config(config)
+    if task_names:
+        examples = []
+        for task_id, name in enumerate(task_names):
+            task_cfg = data_cfg["tasks"][name]
+            examples.extend(
+                load_examples(config, synthetic, task_id=task_id, train_csv=task_cfg["train_csv"])
+            )
+    else:
+        examples = load_examples(config, synthetic)
+
+    dataset = ProteinSequenceDataset(
+        examples=examples,
+        tokenizer=tokenizer,
+        dynamic_padding=data_cfg.get("dynamic_padding", False),
+    )
     return split_dataset(dataset, val_fraction=data_cfg["val_fraction"], seed=config["seed"])
 
 
-def evaluate(model, dataloader, loss_fn, device):
+def compute_loss(
+    model,
+    batch: Dict[str, torch.Tensor],
+    loss_fn,
+    device,
+    task_names: Sequence[str],
+) -> Tuple[torch.Tensor, int]:
+    input_ids = batch["input_ids"].to(device, non_blocking=True)
+    labels = batch["label"].to(device, non_blocking=True)
+    outputs = model(input_ids)
+
+    if not task_names:
+        correct = (torch.argmax(outputs, dim=-1) == labels).sum().item()
+        return loss_fn(outputs, labels), correct
+
+    tasks = batch["task"].to(device, non_blocking=True)
+    loss = torch.zeros((), device=device)
+    correct = 0
+    for task_id, name in enumerate(task_names):
+        mask = tasks.eq(task_id)
+        task_count = int(mask.sum().item())
+        if task_count == 0:
+            continue
+        task_logits = outputs[name][mask]
+        task_labels = labels[mask]
+        loss = loss + loss_fn(task_logits, task_labels) * (task_count / labels.size(0))
+        correct += (torch.argmax(task_logits, dim=-1) == task_labels).sum().item()
+    return loss, correct
+
+
+def evaluate(model, dataloader, loss_fn, device, task_names: Sequence[str] = (), precision: str = FP32):
     model.eval()
     total_loss = 0.0
     total_correct = 0
@@ -49,22 +149,97 @@ def evaluate(model, dataloader, loss_fn, device):
 
     with torch.no_grad():
         for batch in dataloader:
-            input_ids = batch["input_ids"].to(device)
-            labels = batch["label"].to(device)
-
-            logits = model(input_ids)
-            loss = loss_fn(logits, labels)
+            with autocast_context(precision, device.type):
+                loss, correct = compute_loss(model, batch, loss_fn, device, task_names)
+            batch_size = batch["label"].size(0)
 
-            total_loss += loss.item() * labels.size(0)
-            predictions = torch.argmax(logits, dim=-1)
-            total_correct += (predictions == labels).sum().item()
-            total_count += labels.size(0)
+            total_loss += loss.item() * batch_size
+            total_correct += correct
+            total_count += batch_size
 
+    # Each rank scored a disjoint slice of the validation set.
+    total_loss, total_correct, total_count = all_reduce_sum([total_loss, total_correct, total_count], device)
     avg_loss = total_loss / max(total_count, 1)
     accuracy = total_correct / max(total_count, 1)
     return avg_loss, accuracy
 
 
+def build_dataloader(dataset, config: Dict[str, Any], shuffle: bool, collate_fn) -> DataLoader:
+    data_cfg = config["data"]
+    batch_size = config["training"]["batch_size"]
+    sampler_name = data_cfg.get("batch_sampler", "random")
+    rank, world_size = rank_and_world_size()
+
+    loader_kwargs = dataloader_worker_kwargs(data_cfg, iterable=isinstance(dataset, IterableDataset))
+
+    if isinstance(dataset, IterableDataset):
+        # Streaming datasets shuffle through their own buffer and have no length to bucket on.
+        return DataLoader(dataset, batch_size=batch_size, collate_fn=collate_fn, **loader_kwargs)
+    if sampler_name == "length_bucket":
+        batch_sampler = LengthBucketBatchSampler(
+            lengths=dataset_lengths(dataset),
+            batch_size=batch_size,
+            chunk_batches=data_cfg.get("bucket_chunk_batches", 50),
+            shuffle=shuffle,
+            seed=config["seed"],
+            num_replicas=world_size,
+            rank=rank,
+        )
+        return DataLoader(dataset, batch_sampler=batch_sampler, collate_fn=collate_fn, **loader_kwargs)
+    if sampler_name != "random":
+        raise ValueError(f"Unknown data.batch_sampler: {sampler_name}")
+
+    if world_size > 1:
+        if shuffle:
+            sampler = DistributedSampler(dataset, num_replicas=world_size, rank=rank, shuffle=True, seed=config["seed"])
+        else:
+            # Unpadded strided slice, so all-reduced validation metrics count every example once.
+            sampler = range(rank, len(dataset), world_size)
+        return DataLoader(dataset, batch_size=batch_size, sampler=sampler, collate_fn=collate_fn, **loader_kwargs)
+
+    return DataLoader(
+        dataset,
+        batch_size=batch_size,
+        shuffle=shuffle,
+        collate_fn=collate_fn,
+        **loader_kwargs,
+    )
+
+
+def dataloader_worker_kwargs(data_cfg: Dict[str, Any], iterable: bool = False) -> Dict[str, Any]:
+    num_workers = data_cfg.get("num_workers", 0)
+    pin_memory = data_cfg.get("pin_memory", "auto")
+    kwargs: Dict[str, Any] = {
+        "num_workers": num_workers,
+        "pin_memory": torch.cuda.is_available() if pin_memory == "auto" else bool(pin_memory),
+    }
+    if num_workers > 0:
+        # Persistent workers keep their own dataset copy, which would miss a streaming set_epoch().
+        kwargs["persistent_workers"] = data_cfg.get("persistent_workers", True) and not iterable
+        kwargs["prefetch_factor"] = data_cfg.get("prefetch_factor", 2)
+    return kwargs
+
+
+def build_tokenizer(config: Dict[str, Any]) -> ProteinTokenizer:
+    return ProteinTokenizer(
+        max_length=config["model"]["max_length"],
+        length_bucket=config["data"].get("length_bucket", 1),
+    )
+
+
+def create_dataloaders(
+    config: Dict[str, Any],
+    tokenizer: ProteinTokenizer,
+    synthetic: bool,
+) -> Tuple[DataLoader, DataLoader]:
+    train_dataset, val_dataset = create_datasets(config, tokenizer, synthetic=synthetic)
+    collate_fn = DynamicPaddingCollator(tokenizer) if config["data"].get("dynamic_padding", False) else collate_batch
+
+    train_loader = build_dataloader(train_dataset, config, shuffle=True, collate_fn=collate_fn)
+    val_loader = build_dataloader(val_dataset, config, shuffle=False, collate_fn=collate_fn)
+    return train_loader, val_loader
+
+
 def train(config_path: Path, synthetic: bool):
     config = load_config(config_path)
     torch.manual_seed(config["seed"])
@@ -72,34 +247,41 @@ def train(config_path: Path, synthetic: bool):
     training_cfg = config["training"]
     model_cfg = config["model"]
 
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    tokenizer = ProteinTokenizer(max_length=model_cfg["max_length"])
-    train_dataset, val_dataset = create_datasets(config, tokenizer, synthetic=synthetic)
-
-    train_loader = DataLoader(
-        train_dataset,
-        batch_size=training_cfg["batch_size"],
-        shuffle=True,
-        num_workers=0,
-    )
-    val_loader = DataLoader(
-        val_dataset,
-        batch_size=training_cfg["batch_size"],
-        shuffle=False,
-        num_workers=0,
-    )
-
-    model = BasicProteinClassifier(
+    precision = validate_precision(training_cfg.get("precision", FP32))
+    dist_ctx = init_distributed(training_cfg.get("distributed_backend", "gloo"))
+    log = print if dist_ctx.is_main else (lambda *args, **kwargs: None)
+    if torch.cuda.is_available():
+        device = torch.device("cuda", dist_ctx.local_rank) if dist_ctx.enabled else torch.device("cuda")
+    else:
+        device = torch.device("cpu")
+    tokenizer = build_tokenizer(config)
+    train_loader, val_loader = create_dataloaders(config, tokenizer, synthetic=synthetic)
+    train_dataset, val_dataset = train_loader.dataset, val_loader.dataset
+
+    task_names = task_names_from_config(config)
+    model = build_classifier(
+        model_cfg,
         vocab_size=len(tokenizer.vocab.token_to_idx),
-        max_length=model_cfg["max_length"],
-        embedding_dim=model_cfg["embedding_dim"],
-        num_heads=model_cfg["num_heads"],
-        num_layers=model_cfg["num_layers"],
-        ff_dim=model_cfg["ff_dim"],
-        dropout=model_cfg["dropout"],
-        num_classes=model_cfg["num_classes"],
         pad_id=tokenizer.vocab.pad_id,
-    ).to(device)
+    )
+    init_checkpoint = training_cfg.get("init_checkpoint")
+    if init_checkpoint:
+        checkpoint = torch.load(str(init_checkpoint), map_location="cpu")
+        # Raising model.max_length over the checkpoint's grows the position table; everything else loads as is.
+        model.load_state_dict(resize_position_embeddings(checkpoint["model_state_dict"], model_cfg["max_length"]))
+    model.activation_checkpointing = training_cfg.get("activation_checkpointing", False)
+    model = model.to(device)
+    if precision != FP32:
+        disable_encoder_fast_path(model)
+    base_model = model
+    if dist_ctx.enabled:
+        # Heads for tasks missing from a batch get no gradient, so multi-task runs must tolerate unused params.
+        model = DistributedDataParallel(
+            model,
+            device_ids=[device.index] if device.type == "cuda" else None,
+            find_unused_parameters=bool(task_names),
+        )
+        torch.manual_seed(config["seed"] + dist_ctx.rank)
 
     optimizer = torch.optim.AdamW(
         model.parameters(),
@@ -109,53 +291,146 @@ def train(config_path: Path, synthetic: bool):
     loss_fn = nn.CrossEntropyLoss()
 
     output_dir = Path(training_cfg["output_dir"])
-    output_dir.mkdir(parents=True, exist_ok=True)
+    if dist_ctx.is_main:
+        output_dir.mkdir(parents=True, exist_ok=True)
 
     best_val_loss = float("inf")
     epochs = training_cfg["epochs"]
-
-    print(f"Training on device: {device}")
-    print(f"Train samples: {len(train_dataset)} | Val samples: {len(val_dataset)}")
+    accumulation_steps = training_cfg.get("gradient_accumulation_steps", 1)
+    if accumulation_steps < 1:
+        raise ValueError("training.gradient_accumulation_steps must be at least 1")
+    try:
+        num_batches = len(train_loader)
+    except TypeError:
+        num_batches = None
+    padding_efficiency_history = []
+    if dist_ctx.is_main:
+        instrumentation = TrainingInstrumentation.from_config(config, output_dir, device)
+    else:
+        instrumentation = TrainingInstrumentation(output_dir, device)
+
+    log(f"Training on device: {device} | precision: {precision}")
+    if precision != FP32 and device.type == "cpu" and not native_bf16_supported():
+        log("Warning: this CPU has no native bf16 support; autocast will be emulated and likely slower")
+    if dist_ctx.enabled:
+        log(f"DistributedDataParallel: world_size={dist_ctx.world_size}")
+    if init_checkpoint:
+        log(f"Initialized from {init_checkpoint} (max_length={model_cfg['max_length']})")
+    if accumulation_steps > 1 or base_model.activation_checkpointing:
+        log(
+            f"Gradient accumulation: {accumulation_steps} x batch_size={training_cfg['batch_size']} | "
+            f"activation checkpointing: {base_model.activation_checkpointing}"
+        )
+    if isinstance(train_dataset, StreamingSequenceDataset):
+        log(f"Streaming train/val from {len(train_dataset.sources)} shards")
+    else:
+        log(f"Train samples: {len(train_dataset)} | Val samples: {len(val_dataset)}")
 
     for epoch in range(1, epochs + 1):
         model.train()
         running_loss = 0.0
         total_count = 0
-
-        for batch in train_loader:
-            input_ids = batch["input_ids"].to(device)
-            labels = batch["label"].to(device)
-
-            optimizer.zero_grad(set_to_none=True)
-            logits = model(input_ids)
-            loss = loss_fn(logits, labels)
-            loss.backward()
-            optimizer.step()
-
-            batch_size = labels.size(0)
-            running_loss += loss.item() * batch_size
-            total_count += batch_size
+        real_tokens = 0
+        padded_tokens = 0
+        if isinstance(train_loader.batch_sampler, LengthBucketBatchSampler):
+            train_loader.batch_sampler.set_epoch(epoch)
+        if isinstance(train_loader.sampler, DistributedSampler):
+            train_loader.sampler.set_epoch(epoch)
+        if isinstance(train_dataset, StreamingSequenceDataset):
+            train_dataset.set_epoch(epoch)
+
+        # join() lets ranks that run out of streamed batches early shadow the others' all-reduces.
+        with model.join() if dist_ctx.enabled else nullcontext():
+            pending_update = False
+            for step, batch in enumerate(instrumentation.iter_batches(train_loader)):
+                batch_tokens = int(batch["input_ids"].ne(tokenizer.vocab.pad_id).sum())
+                real_tokens += batch_tokens
+                padded_tokens += batch["input_ids"].numel()
+
+                group_start = step - step % accumulation_steps
+                group_size = accumulation_steps
+                if num_batches is not None:
+                    group_size = min(accumulation_steps, num_batches - group_start)
+                update = step - group_start + 1 == group_size
+                # Skip the gradient all-reduce on accumulation micro-batches. An unsized stream cannot tell
+                # which micro-batch is its last, so it syncs every time.
+                skip_sync = dist_ctx.enabled and not update and num_batches is not None
+
+                with model.no_sync() if skip_sync else nullcontext():
+                    # bf16 keeps fp32's exponent range, so backward needs no GradScaler loss scaling.
+                    with instrumentation.stage("forward"), autocast_context(precision, device.type):
+                        loss, _ = compute_loss(model, batch, loss_fn, device, task_names)
+                    with instrumentation.stage("backward"):
+                        (loss / group_size).backward()
+                pending_update = not update
+                if update:
+                    with instrumentation.stage("optimizer"):
+                        optimizer.step()
+                        optimizer.zero_grad(set_to_none=True)
+
+                batch_size = batch["label"].size(0)
+                running_loss += loss.item() * batch_size
+                total_count += batch_size
+                instrumentation.end_step(batch_size, batch_tokens)
+            if pending_update:
+                with instrumentation.stage("optimizer"):
+                    optimizer.step()
+                    optimizer.zero_grad(set_to_none=True)
+        epoch_stats = instrumentation.end_epoch(epoch)
+        running_loss, total_count, real_tokens, padded_tokens = all_reduce_sum(
+            [running_loss, total_count, real_tokens, padded_tokens], device
+        )
 
         train_loss = running_loss / max(total_count, 1)
-        val_loss, val_acc = evaluate(model, val_loader, loss_fn, device)
+        padding_efficiency = real_tokens / max(padded_tokens, 1)
+        padding_efficiency_history.append(padding_efficiency)
+        val_loss, val_acc = evaluate(base_model, val_loader, loss_fn, device, task_names, precision)
 
-        print(
+        peak_memory = peak_memory_mb(device)
+        memory = " | ".join(f"{name}={value:.0f}" for name, value in peak_memory.items())
+        log(
             f"Epoch {epoch:02d}/{epochs} | "
-            f"train_loss={train_loss:.4f} | val_loss={val_loss:.4f} | val_acc={val_acc:.4f}"
+            f"train_loss={train_loss:.4f} | val_loss={val_loss:.4f} | val_acc={val_acc:.4f} | "
+            f"padding_efficiency={padding_efficiency:.3f} | {memory}"
         )
+        if epoch_stats is not None:
+            split = " ".join(f"{stage}={fraction:.0%}" for stage, fraction in epoch_stats["stage_fraction"].items())
+            log(
+                f"  samples/s={epoch_stats['samples_per_s']:.1f} | tokens/s={epoch_stats['tokens_per_s']:.0f} | {split}"
+            )
 
+        # val_loss is already all-reduced, so every rank agrees on when a checkpoint is due.
         if val_loss < best_val_loss:
             best_val_loss = val_loss
-            checkpoint_path = output_dir / "basic_protein_classifier.pt"
-            torch.save(
-                {
-                    "model_state_dict": model.state_dict(),
-                    "config": config,
-                    "vocab": tokenizer.vocab.token_to_idx,
-                },
-                checkpoint_path,
-            )
-            print(f"Saved best checkpoint: {checkpoint_path}")
+            if dist_ctx.is_main:
+                checkpoint_path = output_dir / "basic_protein_classifier.pt"
+                torch.save(
+                    {
+                        "model_state_dict": base_model.state_dict(),
+                        "config": config,
+                        "vocab": tokenizer.vocab.token_to_idx,
+                    },
+                    checkpoint_path,
+                )
+                log(f"Saved best checkpoint: {checkpoint_path}")
+
+    precision_validation = None
+    if precision != FP32:
+        # Parameters and optimizer state stay fp32 under autocast, so the same weights can be scored both ways.
+        fp32_loss, fp32_acc = evaluate(base_model, val_loader, loss_fn, device, task_names, FP32)
+        precision_validation = {
+            precision: {"val_loss": val_loss, "val_acc": val_acc},
+            FP32: {"val_loss": fp32_loss, "val_acc": fp32_acc},
+            "accuracy_drop": fp32_acc - val_acc,
+        }
+        log(
+            f"Final model | {precision} val_acc={val_acc:.4f} | {FP32} val_acc={fp32_acc:.4f} | "
+            f"drop={fp32_acc - val_acc:+.4f}"
+        )
+
+    shutdown_distributed()
+    if not dist_ctx.is_main:
+        return
 
     metadata_path = output_dir / "training_metadata.json"
     metadata = {
@@ -163,7 +438,19 @@ def train(config_path: Path, synthetic: bool):
         "epochs": epochs,
         "synthetic": synthetic,
         "device": str(device),
+        "world_size": dist_ctx.world_size,
+        "precision": precision,
+        "gradient_accumulation_steps": accumulation_steps,
+        "activation_checkpointing": base_model.activation_checkpointing,
+        "peak_memory_mb": peak_memory_mb(device),
+        "padding_efficiency": padding_efficiency_history,
     }
+    if precision_validation is not None:
+        metadata["precision_validation"] = precision_validation
+    profile_path = instrumentation.close()
+    if profile_path is not None:
+        metadata["profile"] = profile_path.name
+        print(f"Saved training profile: {profile_path}")
     metadata_path.write_text(json.dumps(metadata, indent=2), encoding="utf-8")
     print(f"Saved training metadata: {metadata_path}")
 
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+import torch
+import torch.nn as nn
+
+from ml.basic_protein_model import build_classifier
+from ml.precision import BF16, FP32, PRECISIONS, disable_encoder_fast_path, native_bf16_supported, precision_forward
+from training.quantize_model import benchmark_latency, compare_outputs
+from training.train_basic_model import (
+    build_tokenizer,
+    create_dataloaders,
+    evaluate,
+    task_names_from_config,
+)
+
+
+def validate_checkpoint(
+    checkpoint_path: Path,
+    precision: str,
+    synthetic: bool,
+    max_accuracy_drop: float,
+    benchmark_repeats: int,
+) -> Dict[str, Any]:
+    checkpoint = torch.load(str(checkpoint_path), map_location="cpu")
+    if checkpoint.get("quantization"):
+        raise ValueError(f"{checkpoint_path} is quantized ({checkpoint['quantization']}); pass the fp32 checkpoint")
+
+    config = checkpoint["config"]
+    tokenizer = build_tokenizer(config)
+    _, val_loader = create_dataloaders(config, tokenizer, synthetic=synthetic)
+    task_names = task_names_from_config(config)
+
+    model = build_classifier(
+        config["model"],
+        vocab_size=len(tokenizer.vocab.token_to_idx),
+        pad_id=tokenizer.vocab.pad_id,
+    )
+    model.load_state_dict(checkpoint["model_state_dict"])
+    model.eval()
+    # fp32 keeps the fused encoder fast path, so the latency baseline is what production serves today.
+    low_model = disable_encoder_fast_path(copy.deepcopy(model))
+
+    loss_fn = nn.CrossEntropyLoss()
+    device = torch.device("cpu")
+    fp32_loss, fp32_acc = evaluate(model, val_loader, loss_fn, device, task_names, FP32)
+    low_loss, low_acc = evaluate(low_model, val_loader, loss_fn, device, task_names, precision)
+
+    batches = [batch["input_ids"] for batch in val_loader]
+    reference = precision_forward(model, FP32)
+    candidate = precision_forward(low_model, precision)
+    fp32_ms = benchmark_latency(reference, batches, benchmark_repeats)
+    low_ms = benchmark_latency(candidate, batches, benchmark_repeats)
+
+    report = {
+        "checkpoint": str(checkpoint_path),
+        "native_bf16": native_bf16_supported(),
+        "val_samples": sum(input_ids.size(0) for input_ids in batches),
+        FP32: {"val_loss": fp32_loss, "val_acc": fp32_acc, "latency_ms_per_batch": fp32_ms},
+        precision: {"val_loss": low_loss, "val_acc": low_acc, "latency_ms_per_batch": low_ms},
+        "speedup": fp32_ms / low_ms if low_ms > 0 else 0.0,
+        "accuracy_drop": fp32_acc - low_acc,
+        "max_accuracy_drop": max_accuracy_drop,
+        **compare_outputs(reference, candidate, val_loader),
+    }
+    report["passed"] = report["accuracy_drop"] <= max_accuracy_drop
+
+    report_path = checkpoint_path.with_name(f"{checkpoint_path.stem}_{precision}_report.json")
+    report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return report
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare reduced-precision autocast accuracy and latency with fp32")
+    parser.add_argument("--checkpoint", type=str, required=True, help="fp32 checkpoint to validate")
+    parser.add_argument("--precision", choices=[name for name in PRECISIONS if name != FP32], default=BF16)
+    parser.add_argument(
+        "--synthetic",
+        action="store_true",
+        help="Validate on the synthetic dataset instead of the checkpoint's CSV",
+    )
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.01)
+    parser.add_argument("--benchmark-repeats", type=int, default=5)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    report = validate_checkpoint(
+        Path(args.checkpoint),
+        precision=args.precision,
+        synthetic=args.synthetic,
+        max_accuracy_drop=args.max_accuracy_drop,
+        benchmark_repeats=args.benchmark_repeats,
+    )
+
+    print(f"Validation samples: {report['val_samples']} | native bf16: {report['native_bf16']}")
+    for precision in (FP32, args.precision):
+        stats = report[precision]
+        print(f"{precision} | val_acc={stats['val_acc']:.4f} | {stats['latency_ms_per_batch']:.2f} ms/batch")
+    print(
+        f"Speedup: {report['speedup']:.2f}x | prediction agreement: {report['prediction_agreement']:.4f} | "
+        f"max |logit diff|: {report['max_abs_logit_diff']:.4f}"
+    )
+    if not report["passed"]:
+        raise SystemExit(
+            f"Accuracy drop {report['accuracy_drop']:.4f} exceeds {report['max_accuracy_drop']:.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# UniProt accession format, from https://www.uniprot.org/help/accession_numbers
+UNIPROT_ACCESSION = re.compile(
+    r"[OPQ][0-9][A-Z0-9]{3}[0-9]"
+    r"|[A-NR-Z][0-9](?:[A-Z][A-Z0-9]{2}[0-9]){1,2}"
+)
+
+
+def iter_fasta_records(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Yield (header, sequence) pairs from FASTA lines without buffering the whole file."""
+    header = ""
+    current: List[str] = []
+    seen_record = False
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(">"):
+            if seen_record:
+                yield header, "".join(current)
+            header = line[1:].strip()
+            current = []
+            seen_record = True
+            continue
+        current.append(line)
+        seen_record = True
+    if seen_record:
+        yield header, "".join(current)
+
+
+def uniprot_accession(header: str) -> Optional[str]:
+    """Return the accession from a UniProt header (``sp|P69905|HBA_HUMAN ...``) or a bare id."""
+    token = header.split()[0] if header.strip() else ""
+    parts = token.split("|")
+    if len(parts) >= 3 and parts[0] in {"sp", "tr"}:
+        token = parts[1]
+    # Isoforms (P69905-2) keep their suffix: they are different sequences.
+    return token if UNIPROT_ACCESSION.fullmatch(token.split("-")[0]) else None